@@ -0,0 +1,281 @@
+# 헤드리스 일괄 처리: 학생 프로필(CSV/JSONL) → Profile 분석 · Evidence Digest · Trend Pulse · Plan Builder.
+# Streamlit 없이 engine.py만 사용한다. 학생 단위로 워커 풀에서 돌리고, 끝난 학생은 바로 JSONL에 한 줄씩 쓴다.
+# 같은 --out으로 다시 실행하면 이미 성공한 학생은 건너뛴다(실패한 학생만 재시도).
+#
+#   python batch.py students.csv --out results.jsonl --parquet results.parquet --workers 4 --naver-qps 8
+#
+# 키: OPENAI_API_KEY, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET (환경변수), 모델: --model 또는 OPENAI_MODEL
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+import engine
+from engine import (
+    extract_many,
+    llm_digest_map_reduce,
+    llm_enabled,
+    llm_plan_builder,
+    llm_profile_analysis,
+    llm_trend_interpretation,
+    naver_search_all,
+    now_str,
+    trend_store,
+    trend_features,
+)
+
+# profile_form 필드와 UI 기본값
+PROFILE_DEFAULTS: Dict[str, Any] = {
+    "major": "",
+    "semester": "1학년 1학기",
+    "plan": "본전공 유지",
+    "gpa": 3.5,
+    "major_credit": 45,
+    "liberal_credit": 30,
+    "total_required": 130,
+    "major_required": 60,
+    "liberal_required": 30,
+    "interest": "",
+}
+STEPS = ("profile", "digest", "trend", "plan")
+ID_COLUMNS = ("student_id", "id")
+
+
+def parse_profile(row: Dict[str, Any]) -> Dict[str, Any]:
+    profile = {}
+    for k, default in PROFILE_DEFAULTS.items():
+        v = row.get(k, "")
+        if v is None or str(v).strip() == "":
+            profile[k] = default
+        elif isinstance(default, (int, float)):
+            try:
+                profile[k] = type(default)(float(v))
+            except (ValueError, OverflowError):
+                raise ValueError(f"{k}={v!r}: 숫자가 아닙니다") from None
+        else:
+            profile[k] = str(v).strip()
+    return profile
+
+
+def read_profiles(path: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Dict[str, Any]]]:
+    # 잘못된 행 하나 때문에 전체가 멈추지 않도록, 읽을 수 없는 행은 status=error 기록으로 따로 돌려준다.
+    rows: List[Any] = []
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    rows.append(e)
+    else:
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict("records")
+
+    profiles, invalid = [], []
+    for i, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            error = f"{type(row).__name__}: {row}" if isinstance(row, Exception) else "ValueError: JSON 객체가 아닙니다"
+            invalid.append({"student_id": str(i), "profile": None, "status": "error", "error": error})
+            continue
+        sid = next((str(row[c]).strip() for c in ID_COLUMNS if str(row.get(c, "") or "").strip()), str(i))
+        try:
+            profiles.append((sid, parse_profile(row)))
+        except ValueError as e:
+            invalid.append({"student_id": sid, "profile": row, "status": "error", "error": f"ValueError: {e}"})
+    return profiles, invalid
+
+
+def load_done(out_path: str) -> Set[str]:
+    # 체크포인트 = 결과 JSONL 자체. 마지막 줄이 중간에 잘려 있어도(강제 종료) 무시하고 이어간다.
+    done: Set[str] = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("status") == "ok":
+                done.add(rec["student_id"])
+    return done
+
+
+class ResultWriter:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _keywords(profile: Dict[str, Any], analysis: Optional[Dict[str, Any]], limit: int = 5) -> List[str]:
+    suggested = [k for k in ((analysis or {}).get("keyword_suggestions") or []) if isinstance(k, str) and k.strip()]
+    if not suggested:
+        suggested = [k.strip() for k in str(profile.get("interest", "")).replace("\n", ",").split(",") if k.strip()]
+    if not suggested and profile.get("major"):
+        suggested = [profile["major"]]
+    return list(dict.fromkeys(suggested))[:limit]
+
+
+def run_student(sid: str, profile: Dict[str, Any], cfg: argparse.Namespace) -> Dict[str, Any]:
+    # UI 탭 순서와 같은 흐름: 분석 → (키워드) → Digest/Trend → Plan
+    started = time.monotonic()
+    rec: Dict[str, Any] = {"student_id": sid, "profile": profile}
+    llm = llm_enabled(cfg.openai_key)
+    naver = bool(cfg.naver_id and cfg.naver_secret)
+
+    analysis = None
+    if "profile" in cfg.steps and llm:
+        analysis = llm_profile_analysis(profile, cfg.openai_key, cfg.model)
+        rec["analysis"] = analysis
+    keywords = _keywords(profile, analysis)
+    rec["keywords"] = keywords
+
+    digest = None
+    if "digest" in cfg.steps and naver and llm and keywords:
+        query = keywords[0]
+        hits = naver_search_all(query, cfg.naver_id, cfg.naver_secret, display=cfg.docs)
+        rows = hits.to_dict("records") if not hits.empty else []
+        texts = extract_many([r.get("Link", "") for r in rows])
+        sources = [
+            {
+                "Title": r.get("Title", ""),
+                "Link": r.get("Link", ""),
+                "Published": r.get("Published", ""),
+                "Type": r.get("Type", ""),
+                "Snippet": r.get("Snippet", ""),
+                "ExtractedText": texts.get(r.get("Link", ""), "") or r.get("Snippet", ""),
+            }
+            for r in rows
+        ]
+        if sources:
+            digest = llm_digest_map_reduce(sources, cfg.openai_key, cfg.model, query=f"{query} {profile.get('interest', '')}")
+            rec["digest_query"] = query
+            rec["digest"] = digest
+
+    trend_summary = None
+    if "trend" in cfg.steps and naver and keywords:
+        end = date.today()
+        df = trend_store().query(cfg.naver_id, cfg.naver_secret, end - timedelta(days=cfg.trend_days), end, cfg.time_unit, keywords)
+        if not df.empty:
+            rec["trend_features"] = json.loads(trend_features(df, cfg.time_unit).reset_index().to_json(orient="records", force_ascii=False))
+            if llm:
+                trend_summary = llm_trend_interpretation(df, cfg.openai_key, cfg.model, cfg.time_unit)
+                rec["trend_summary"] = trend_summary
+
+    if "plan" in cfg.steps and llm:
+        context = {"profile": profile, "analysis": analysis, "digest": digest, "trend_summary": trend_summary}
+        rec["plan"] = llm_plan_builder(context, cfg.openai_key, cfg.model)
+
+    rec["elapsed_s"] = round(time.monotonic() - started, 2)
+    return rec
+
+
+def write_parquet(jsonl_path: str, parquet_path: str) -> int:
+    # 학생별 마지막 기록만 남기고, 중첩 필드는 JSON 문자열 열로 저장한다.
+    latest: Dict[str, Dict[str, Any]] = {}
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            latest[rec["student_id"]] = rec
+    rows = [
+        {k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v for k, v in rec.items()}
+        for rec in latest.values()
+    ]
+    pd.DataFrame(rows).to_parquet(parquet_path, index=False)
+    return len(rows)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="MajorPass headless batch pipeline")
+    p.add_argument("input", help="학생 프로필 CSV 또는 JSONL (profile_form 필드 + student_id)")
+    p.add_argument("--out", default="results.jsonl", help="결과 JSONL (체크포인트 겸용)")
+    p.add_argument("--parquet", default="", help="끝난 뒤 Parquet으로도 저장할 경로")
+    p.add_argument("--steps", default=",".join(STEPS), help=f"실행할 단계 (기본: {','.join(STEPS)})")
+    p.add_argument("--workers", type=int, default=4, help="동시에 처리할 학생 수")
+    p.add_argument("--naver-qps", type=float, default=engine.NAVER_QPS, help="Naver API 초당 호출 상한 (0이면 제한 없음)")
+    p.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+    p.add_argument("--docs", type=int, default=5, help="Digest에 쓸 검색 결과 수")
+    p.add_argument("--time-unit", default="week", choices=["date", "week", "month"])
+    p.add_argument("--trend-days", type=int, default=365)
+    p.add_argument("--no-resume", action="store_true", help="기존 결과를 지우고 처음부터")
+    args = p.parse_args(argv)
+    args.steps = {s.strip() for s in args.steps.split(",") if s.strip()}
+    unknown = args.steps - set(STEPS)
+    if unknown:
+        p.error(f"unknown steps: {', '.join(sorted(unknown))}")
+    args.openai_key = os.getenv("OPENAI_API_KEY", "")
+    args.naver_id = os.getenv("NAVER_CLIENT_ID", "")
+    args.naver_secret = os.getenv("NAVER_CLIENT_SECRET", "")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    engine.naver_throttle().rate = args.naver_qps
+    if not llm_enabled(args.openai_key):
+        print("warning: OPENAI_API_KEY 없음 → LLM 단계(profile/digest/plan/해석)는 건너뜁니다.", file=sys.stderr)
+    if not (args.naver_id and args.naver_secret):
+        print("warning: NAVER 키 없음 → digest/trend 단계는 건너뜁니다.", file=sys.stderr)
+
+    if args.no_resume and os.path.exists(args.out):
+        os.remove(args.out)
+    profiles, invalid = read_profiles(args.input)
+    done = load_done(args.out)
+    todo = [(sid, prof) for sid, prof in profiles if sid not in done]
+    invalid = [rec for rec in invalid if rec["student_id"] not in done]
+    print(f"{len(profiles)} students, {len(done)} already done, {len(todo)} to run, {len(invalid)} invalid", file=sys.stderr)
+
+    writer = ResultWriter(args.out)
+    ok = failed = 0
+    try:
+        for rec in invalid:
+            rec["finished_at"] = now_str()
+            writer.write(rec)
+            failed += 1
+            print(f"[invalid] {rec['student_id']} {rec['error']}", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="batch") as pool:
+            futures = {pool.submit(run_student, sid, prof, args): (sid, prof) for sid, prof in todo}
+            for n, fut in enumerate(as_completed(futures), start=1):
+                sid, prof = futures[fut]
+                try:
+                    rec = {**fut.result(), "status": "ok"}
+                    ok += 1
+                except Exception as e:
+                    rec = {"student_id": sid, "profile": prof, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                    failed += 1
+                rec["finished_at"] = now_str()
+                writer.write(rec)
+                print(f"[{n}/{len(todo)}] {sid} {rec['status']}", file=sys.stderr)
+    finally:
+        writer.close()
+
+    if args.parquet:
+        print(f"parquet: {write_parquet(args.out, args.parquet)} rows → {args.parquet}", file=sys.stderr)
+    print(f"done: {ok} ok, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+# 오프라인 벤치마크용 가짜 서버: Naver 검색/Datalab, OpenAI 호환 chat completions, 정적 기사 호스트.
+# 서비스마다 지연(latency)·지터(jitter)·오류율(error_rate)을 따로 줄 수 있고, 응답은 seed로 재현 가능하다.
+# 각 서버는 GET /__stats (호출 수 JSON), POST /__reset 을 지원한다.
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+
+@dataclass
+class Behavior:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    token_ms: float = 0.0  # OpenAI: 출력 토큰(여기선 문자)당 추가 지연
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str, handler: type, behavior: Behavior, seed: int = 0):
+        super().__init__((host, 0), handler)
+        self.behavior = behavior
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeServer
+    protocol_version = "HTTP/1.1"  # keep-alive: 클라이언트 커넥션 풀 동작을 실제와 같게
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    # --- 공통 ---
+    def _count(self, key: str) -> None:
+        with self.server.lock:
+            self.server.calls[key] = self.server.calls.get(key, 0) + 1
+
+    def _delay_or_fail(self) -> bool:
+        b = self.server.behavior
+        with self.server.lock:
+            delay = max(0.0, b.latency_ms + self.server.rng.uniform(-b.jitter_ms, b.jitter_ms))
+            fail = self.server.rng.random() < b.error_rate
+        time.sleep(delay / 1000.0)
+        if fail:
+            self._count("errors")
+            self._send(b.error_status, {"error": "injected"})
+        return fail
+
+    def _body(self) -> Dict[str, Any]:
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}")
+
+    def _send(self, status: int, payload: Any, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _admin(self) -> bool:
+        path = urlparse(self.path).path
+        if path == "/__stats":
+            with self.server.lock:
+                self._send(200, dict(self.server.calls))
+            return True
+        if path == "/__reset":
+            self._body()
+            with self.server.lock:
+                self.server.calls.clear()
+            self._send(200, {})
+            return True
+        return False
+
+    def do_GET(self) -> None:
+        if not self._admin():
+            self._send(404, {})
+
+    def do_POST(self) -> None:
+        if not self._admin():
+            self._send(404, {})
+
+
+# ---------------------------------------------------------
+# Naver (search + datalab)
+# ---------------------------------------------------------
+class NaverHandler(_Handler):
+    article_hosts: List[str] = []
+    search_total = 1000
+
+    def do_GET(self) -> None:
+        if self._admin():
+            return
+        url = urlparse(self.path)
+        if not url.path.startswith("/v1/search/"):
+            self._send(404, {})
+            return
+        self._count("search")
+        if self._delay_or_fail():
+            return
+        category = url.path.rsplit("/", 1)[-1].split(".")[0]
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        query, start, display = q.get("query", ""), int(q.get("start", 1)), int(q.get("display", 10))
+        n = max(0, min(display, self.search_total - start + 1))
+        items = []
+        for i in range(start, start + n):
+            # 카테고리끼리 일부 링크가 겹치게 해서 RRF 병합 경로도 타게 한다.
+            doc = i if i % 3 == 0 else f"{category}-{i}"
+            h = int(hashlib.md5(f"{query}:{doc}".encode()).hexdigest(), 16)
+            host = self.article_hosts[h % len(self.article_hosts)] if self.article_hosts else "http://127.0.0.1:9"
+            items.append(
+                {
+                    "title": f"<b>{query}</b> 관련 기사 {doc}",
+                    "description": f"{query}에 대한 {category} 문서 {doc}의 요약입니다.",
+                    "link": f"{host}/a/{h % 100000}.html",
+                    "pubDate": "Mon, 06 Jan 2025 09:00:00 +0900",
+                }
+            )
+        self._send(200, {"total": self.search_total, "start": start, "display": n, "items": items})
+
+    def do_POST(self) -> None:
+        if self._admin():
+            return
+        if urlparse(self.path).path != "/v1/datalab/search":
+            self._send(404, {})
+            return
+        self._count("datalab")
+        body = self._body()
+        if self._delay_or_fail():
+            return
+        periods = _periods(date.fromisoformat(body["startDate"]), date.fromisoformat(body["endDate"]), body.get("timeUnit", "week"))
+        series = []
+        for g in body.get("keywordGroups", []):
+            seed = int(hashlib.md5(g["groupName"].encode()).hexdigest(), 16)
+            level, phase = 20 + seed % 60, (seed >> 8) % 52
+            vals = [level * (1 + 0.3 * math.sin((d.toordinal() / 7 + phase) * 2 * math.pi / 52)) for d in periods]
+            series.append((g["groupName"], vals))
+        # 실제 API처럼 요청 안의 최대값을 100으로 정규화
+        peak = max((v for _, vals in series for v in vals), default=0) or 1
+        results = [
+            {"title": name, "keywords": [name], "data": [{"period": d.isoformat(), "ratio": round(v * 100 / peak, 5)} for d, v in zip(periods, vals)]}
+            for name, vals in series
+        ]
+        self._send(200, {"startDate": body["startDate"], "endDate": body["endDate"], "timeUnit": body.get("timeUnit"), "results": results})
+
+
+def _periods(start: date, end: date, unit: str) -> List[date]:
+    if unit == "month":
+        cur, out = start.replace(day=1), []
+        while cur <= end:
+            out.append(cur)
+            cur = (cur.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return out
+    if unit == "week":
+        cur = start - timedelta(days=start.weekday())
+        step = timedelta(days=7)
+    else:
+        cur, step = start, timedelta(days=1)
+    out = []
+    while cur <= end:
+        out.append(cur)
+        cur += step
+    return out
+
+
+# ---------------------------------------------------------
+# OpenAI-compatible chat completions
+# ---------------------------------------------------------
+def _instance(schema: Any) -> Any:
+    # output_schema 예시를 그대로 채운 응답(파서/렌더 경로를 실제처럼 탄다).
+    if isinstance(schema, dict):
+        return {k: _instance(v) for k, v in schema.items()}
+    if isinstance(schema, list):
+        return [_instance(schema[0]) for _ in range(3)] if schema else []
+    if isinstance(schema, str):
+        return schema.split("|")[0] if "|" in schema else "샘플 문장입니다. 실행 가능한 다음 행동을 적습니다."
+    return schema
+
+
+class OpenAIHandler(_Handler):
+    text_chars = 600  # 스키마 없는 응답(트렌드 해석/채팅) 길이
+
+    def do_POST(self) -> None:
+        if self._admin():
+            return
+        if not urlparse(self.path).path.endswith("/chat/completions"):
+            self._send(404, {})
+            return
+        self._count("chat")
+        body = self._body()
+        if self._delay_or_fail():
+            return
+        content = self._content(body)
+        headers = {
+            "x-ratelimit-limit-requests": "10000",
+            "x-ratelimit-remaining-requests": "9999",
+            "x-ratelimit-reset-requests": "6ms",
+            "x-ratelimit-limit-tokens": "10000000",
+            "x-ratelimit-remaining-tokens": "9990000",
+            "x-ratelimit-reset-tokens": "1ms",
+        }
+        token_s = self.server.behavior.token_ms / 1000.0
+        if body.get("stream"):
+            self._count("chat_stream")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            for i in range(0, len(content), 8):
+                piece = content[i : i + 8]
+                time.sleep(token_s * len(piece))
+                chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": body.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+        time.sleep(token_s * len(content))
+        prompt = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        self._send(
+            200,
+            {
+                "id": "bench",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt // 2, "completion_tokens": len(content), "total_tokens": prompt // 2 + len(content)},
+            },
+            headers=headers,
+        )
+
+    def _content(self, body: Dict[str, Any]) -> str:
+        user = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+        try:
+            payload = json.loads(user)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict) and "output_schema" in payload:
+            out = _instance(payload["output_schema"])
+            if "digests" in (payload.get("output_schema") or {}) and "sources" in payload:
+                out["digests"] = [_instance(payload["output_schema"]["digests"][0]) for _ in payload["sources"]]
+            return json.dumps(out, ensure_ascii=False)
+        base = "트렌드와 대화 맥락을 바탕으로 정리한 벤치마크용 응답입니다. "
+        return (base * (self.text_chars // len(base) + 1))[: self.text_chars]
+
+
+# ---------------------------------------------------------
+# Static article host
+# ---------------------------------------------------------
+class ArticleHandler(_Handler):
+    paragraphs = 30
+    # 실제 검색 결과처럼 섞는다: 일부 링크는 PDF, 일부는 <article> 없는 큰 페이지(광고·스크립트 덩어리)
+    pdf_every = 10
+    heavy_every = 7
+    heavy_bytes = 6 * 1024 * 1024
+
+    def do_GET(self) -> None:
+        if self._admin():
+            return
+        self._count("article")
+        if self._delay_or_fail():
+            return
+        path = urlparse(self.path).path
+        etag = '"' + hashlib.md5(path.encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._count("article_304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        n = int(re.sub(r"\D", "", path) or 0)
+        if self.pdf_every and n % self.pdf_every == 0:
+            self._send(200, b"%PDF-1.7\n" + b"0" * (2 * 1024 * 1024), "application/pdf", {"ETag": etag})
+            return
+        if self.heavy_every and n % self.heavy_every == 0:
+            text = "".join(f"<div class='c'>{path} 본문 {i}. 진로 준비와 전공 선택 이야기.<br></div>" for i in range(self.paragraphs))
+            html = f"<html><body><div id='content'>{text}</div><div>{'x' * self.heavy_bytes}</div></body></html>"
+            self._send(200, html.encode("utf-8"), "text/html", {"ETag": etag})
+            return
+        body = "".join(
+            f"<p>{path} 문단 {i}. 전공 선택과 진로 준비에 관한 설명이 이어집니다. 데이터 분석과 UX 역량이 중요합니다.</p>"
+            for i in range(self.paragraphs)
+        )
+        html = (
+            f"<html><head><title>Article {path}</title></head><body><nav>메뉴 | 로그인</nav>"
+            f"<article><h1>Article {path}</h1>{body}</article><footer>© bench</footer></body></html>"
+        )
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8", {"ETag": etag})
+
+
+# ---------------------------------------------------------
+# 묶음 실행
+# ---------------------------------------------------------
+class FakeStack:
+    def __init__(
+        self,
+        naver: Behavior,
+        openai: Behavior,
+        articles: Behavior,
+        article_hosts: int = 4,
+        seed: int = 0,
+    ):
+        # 기사 호스트는 127.0.0.N으로 나눠 호스트별 동시 접속 제한(extract_many)이 실제처럼 걸리게 한다.
+        self.article_servers = [
+            FakeServer(f"127.0.0.{10 + i}", type("ArticleHost", (ArticleHandler,), {}), articles, seed + i).start()
+            for i in range(article_hosts)
+        ]
+        naver_handler = type("Naver", (NaverHandler,), {"article_hosts": [s.url for s in self.article_servers]})
+        self.naver = FakeServer("127.0.0.1", naver_handler, naver, seed + 100).start()
+        self.openai = FakeServer("127.0.0.1", OpenAIHandler, openai, seed + 200).start()
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "MAJORPASS_NAVER_API_BASE": self.naver.url,
+            "OPENAI_BASE_URL": f"{self.openai.url}/v1",
+            "OPENAI_API_KEY": "sk-bench",
+            "NAVER_CLIENT_ID": "bench",
+            "NAVER_CLIENT_SECRET": "bench",
+        }
+
+    def servers(self) -> List[Tuple[str, FakeServer]]:
+        return [("naver", self.naver), ("openai", self.openai), *(("articles", s) for s in self.article_servers)]
+
+    def spec(self) -> str:
+        return ",".join(f"{name}={srv.url}" for name, srv in self.servers())
+
+    def close(self) -> None:
+        for _, srv in self.servers():
+            srv.shutdown()
+            srv.server_close()
+
+
+# 벤치마크 자식 프로세스가 서버별 호출 수를 읽고/초기화할 때 쓰는 헬퍼 (BENCH_SERVERS="naver=http://…,openai=http://…")
+def parse_servers(spec: str) -> List[Tuple[str, str]]:
+    return [tuple(part.split("=", 1)) for part in spec.split(",") if "=" in part]  # type: ignore[misc]
+
+
+def remote_stats(servers: List[Tuple[str, str]]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for name, url in servers:
+        with urlopen(f"{url}/__stats", timeout=5) as r:
+            for k, v in json.load(r).items():
+                key = f"{name}.{k}" if k == "errors" else k
+                out[key] = out.get(key, 0) + v
+    return out
+
+
+def remote_reset(servers: List[Tuple[str, str]]) -> None:
+    for _, url in servers:
+        urlopen(Request(f"{url}/__reset", data=b"{}", method="POST"), timeout=5).close()
@@ -0,0 +1,236 @@
+# 오프라인 end-to-end 벤치마크: 가짜 서버(bench/fakes.py)를 띄우고 앱의 각 흐름을 실제 엔진 코드로 실행한다.
+# 흐름마다 새 프로세스 + 빈 캐시 디렉터리에서 cold(첫 호출) → warm(같은 입력 반복)을 재고,
+# wall time / 서비스별 호출 수 / 최대 메모리(RSS, 선택적으로 tracemalloc)를 출력한다.
+#
+#   python bench/run.py                               # 전체 흐름
+#   python bench/run.py --flows digest,trend --openai latency=800,jitter=200,token_ms=1
+#   python bench/run.py --json bench.json             # 결과 저장
+#   python bench/run.py --compare bench.json          # 저장된 결과 대비 회귀가 있으면 exit 1
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import fields
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import Behavior, FakeStack, parse_servers, remote_reset, remote_stats  # noqa: E402
+
+FLOWS = ("profile", "digest", "trend", "plan", "chat", "batch")
+MODEL = "gpt-4o-mini"
+PROFILE = {
+    "major": "경영학과",
+    "semester": "2학년 2학기",
+    "plan": "복수전공 희망",
+    "gpa": 3.72,
+    "major_credit": 48,
+    "liberal_credit": 27,
+    "total_required": 130,
+    "major_required": 60,
+    "liberal_required": 30,
+    "interest": "PM, UX, 데이터 분석",
+}
+DIGEST_QUERY = "UX 리서치 인턴"
+DIGEST_SEARCH = 30  # Digest 탭 기본 검색 결과 수
+DIGEST_DOCS = 6  # 요약에 넣는 문서 수(max_digest_docs 기본값)
+TREND_KEYWORDS = ["UX", "PM", "데이터 분석", "브랜딩", "콘텐츠 마케팅", "서비스 기획", "SQL", "프로덕트 디자인"]
+BATCH_STUDENTS = 8
+
+# 회귀 판정: 시간은 허용 비율 + 절대 여유(지터), 호출 수는 증가하면 회귀
+TIME_TOLERANCE = 0.25
+TIME_SLACK_S = 0.15
+
+
+# ---------------------------------------------------------
+# child: 흐름 하나 실행
+# ---------------------------------------------------------
+def _flow_steps(flow: str, tmp: str) -> Callable[[], Any]:
+    import engine
+
+    key, nid, nsecret = os.environ["OPENAI_API_KEY"], os.environ["NAVER_CLIENT_ID"], os.environ["NAVER_CLIENT_SECRET"]
+
+    def digest() -> Any:
+        hits = engine.naver_search_all(DIGEST_QUERY, nid, nsecret, display=DIGEST_SEARCH)
+        rows = hits.head(DIGEST_DOCS).to_dict("records")
+        texts = engine.extract_many([r["Link"] for r in rows])
+        sources = [{**r, "ExtractedText": texts.get(r["Link"], "") or r["Snippet"]} for r in rows]
+        return engine.llm_digest_map_reduce(sources, key, MODEL, query=f"{DIGEST_QUERY} {PROFILE['interest']}")
+
+    def trend() -> Any:
+        from datetime import date, timedelta
+
+        end = date.today()
+        df = engine.trend_store().query(nid, nsecret, end - timedelta(days=365), end, "week", TREND_KEYWORDS, TREND_KEYWORDS[0])
+        engine.trend_features(df, "week")
+        return engine.llm_trend_interpretation(df, key, MODEL, "week")
+
+    if flow == "profile":
+        return lambda: engine.llm_profile_analysis(PROFILE, key, MODEL)
+    if flow == "digest":
+        return digest
+    if flow == "trend":
+        return trend
+    if flow == "plan":
+        context = {"profile": PROFILE, "analysis": engine.llm_profile_analysis(PROFILE, key, MODEL), "digest": digest(), "trend_summary": trend()}
+        return lambda: engine.llm_plan_builder(context, key, MODEL)
+    if flow == "chat":
+        history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"이전 대화 {i}: UX 포트폴리오 준비"} for i in range(10)]
+        blob = engine.chat_context_blob({"profile": PROFILE})
+        # 채팅은 캐시하지 않으므로 warm도 매번 실제 호출이다.
+        return lambda: "".join(
+            engine.llm_chat_stream(openai_key=key, model=MODEL, history=history, context_blob=blob, user_message="다음 주에 뭘 하면 좋을까?")
+        )
+    if flow == "batch":
+        import batch
+
+        path = os.path.join(tmp, "students.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(BATCH_STUDENTS):
+                f.write(json.dumps({**PROFILE, "student_id": f"s{i}", "interest": f"{PROFILE['interest']}, 주제 {i}"}, ensure_ascii=False) + "\n")
+        out = os.path.join(tmp, "results.jsonl")
+        # warm = 같은 입력으로 새로 실행(체크포인트 없이) → 엔진 캐시만 재사용
+        return lambda: batch.main([path, "--out", out, "--no-resume", "--workers", "4"])
+    raise ValueError(flow)
+
+
+def run_child(flow: str, repeat: int, trace: bool) -> Dict[str, Any]:
+    servers = parse_servers(os.environ["BENCH_SERVERS"])
+    tmp = os.environ["MAJORPASS_CACHE_DIR"]
+    step = _flow_steps(flow, tmp)
+    phases = []
+    for i in range(1 + repeat):
+        remote_reset(servers)
+        if trace:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        step()
+        wall = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if trace:
+            tracemalloc.stop()
+        phases.append({"phase": "cold" if i == 0 else "warm", "wall_s": round(wall, 4), "calls": remote_stats(servers), "py_peak_bytes": peak})
+    if os.environ.get("BENCH_TRACE_DIR"):
+        import engine
+
+        with open(os.path.join(os.environ["BENCH_TRACE_DIR"], f"{flow}.trace.json"), "w", encoding="utf-8") as f:
+            json.dump(engine.tracer().chrome_trace(), f, ensure_ascii=False)
+    return {"flow": flow, "phases": phases, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+# ---------------------------------------------------------
+# parent: 서버 + 흐름별 프로세스
+# ---------------------------------------------------------
+def parse_behavior(spec: str, default: Behavior) -> Behavior:
+    # "latency=80,jitter=20,errors=0.02,status=429,token_ms=0.5"
+    names = {"latency": "latency_ms", "jitter": "jitter_ms", "errors": "error_rate", "status": "error_status", "token_ms": "token_ms"}
+    values = {f.name: getattr(default, f.name) for f in fields(Behavior)}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        k, v = part.split("=", 1)
+        attr = names.get(k.strip(), k.strip())
+        if attr not in values:
+            raise SystemExit(f"unknown behavior key: {k}")
+        values[attr] = type(values[attr])(float(v))
+    return Behavior(**values)
+
+
+def _summarize(results: List[Dict[str, Any]]) -> None:
+    print(f"{'flow':<8} {'phase':<5} {'wall_s':>8}  {'py_peak_MB':>10}  calls")
+    for r in results:
+        for p in r["phases"]:
+            calls = " ".join(f"{k}={v}" for k, v in sorted(p["calls"].items()))
+            peak = f"{p['py_peak_bytes'] / 1e6:10.1f}" if p["py_peak_bytes"] is not None else f"{'-':>10}"
+            print(f"{r['flow']:<8} {p['phase']:<5} {p['wall_s']:8.3f}  {peak}  {calls}")
+        print(f"{'':<8} {'rss':<5} {r['max_rss_kb'] / 1024:7.1f}M")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {r["flow"]: r for r in json.load(f)["results"]}
+    problems = []
+    for r in results:
+        b = base.get(r["flow"])
+        if not b:
+            continue
+        for p, bp in zip(r["phases"], b["phases"]):
+            label = f"{r['flow']}/{p['phase']}"
+            if p["wall_s"] > bp["wall_s"] * (1 + TIME_TOLERANCE) + TIME_SLACK_S:
+                problems.append(f"{label}: wall {bp['wall_s']:.3f}s → {p['wall_s']:.3f}s")
+            for k, v in p["calls"].items():
+                if k.endswith("errors"):
+                    continue
+                if v > bp["calls"].get(k, 0):
+                    problems.append(f"{label}: {k} calls {bp['calls'].get(k, 0)} → {v}")
+    return problems
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="MajorPass offline benchmark")
+    p.add_argument("--flows", default=",".join(FLOWS))
+    p.add_argument("--repeat", type=int, default=1, help="cold 이후 warm 반복 횟수")
+    p.add_argument("--naver", default="latency=60,jitter=20", help="Naver 검색/Datalab 서버 동작")
+    p.add_argument("--openai", default="latency=300,jitter=100,token_ms=0.3", help="OpenAI 서버 동작")
+    p.add_argument("--articles", default="latency=120,jitter=80,errors=0.02", help="기사 호스트 동작")
+    p.add_argument("--article-hosts", type=int, default=4)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--tracemalloc", action="store_true", help="단계별 Python 할당 peak도 측정(시간 측정에 오버헤드 있음)")
+    p.add_argument("--json", default="", help="결과를 JSON으로 저장")
+    p.add_argument("--trace-dir", default="", help="흐름별 Chrome trace(JSON)를 저장할 디렉터리")
+    p.add_argument("--compare", default="", help="기준 JSON 대비 회귀 검사")
+    p.add_argument("--child", default="", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.repeat, args.tracemalloc)))
+        return 0
+
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        p.error(f"unknown flows: {', '.join(sorted(unknown))}")
+    stack = FakeStack(
+        naver=parse_behavior(args.naver, Behavior()),
+        openai=parse_behavior(args.openai, Behavior()),
+        articles=parse_behavior(args.articles, Behavior()),
+        article_hosts=args.article_hosts,
+        seed=args.seed,
+    )
+    results = []
+    try:
+        for flow in flows:
+            with tempfile.TemporaryDirectory(prefix=f"bench-{flow}-") as tmp:
+                env = {**os.environ, **stack.env(), "BENCH_SERVERS": stack.spec(), "MAJORPASS_CACHE_DIR": tmp}
+                if args.trace_dir:
+                    os.makedirs(args.trace_dir, exist_ok=True)
+                    env["BENCH_TRACE_DIR"] = os.path.abspath(args.trace_dir)
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", flow, "--repeat", str(args.repeat)]
+                if args.tracemalloc:
+                    cmd.append("--tracemalloc")
+                proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(proc.stderr, file=sys.stderr)
+                    raise SystemExit(f"flow {flow} failed")
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    finally:
+        stack.close()
+
+    _summarize(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        problems = compare(results, args.compare)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# 콜드 스타트 벤치마크: 새 `streamlit run app.py` 프로세스를 띄우고 첫 세션이 받는 메시지 시각을 잰다.
+# - ready: 프로세스 시작 → /_stcore/health 응답
+# - first_paint: 첫 rerun 요청 → 첫 delta(화면에 그려지는 첫 요소) 수신
+# - full_render: 첫 rerun 요청 → script_finished
+# 앱 모듈(엔진 포함)은 첫 세션의 스크립트 실행에서 import 되므로 first_paint/full_render에 그 비용이 들어간다.
+#
+#   python bench/startup.py --runs 5
+#
+# 브라우저 대신 websocket으로 접속한다(websockets 패키지 필요: pip install websockets).
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+READY_TIMEOUT_S = 60.0
+RENDER_TIMEOUT_S = 120.0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start() -> Dict[str, float]:
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from websockets.sync.client import connect
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        env = {**os.environ, "MAJORPASS_CACHE_DIR": tmp}
+        cmd = [
+            sys.executable, "-m", "streamlit", "run", APP,
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--browser.gatherUsageStats", "false",
+        ]
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                if time.perf_counter() - t0 > READY_TIMEOUT_S or proc.poll() is not None:
+                    raise RuntimeError("streamlit server did not become ready")
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).read()
+                    break
+                except OSError:
+                    time.sleep(0.02)
+            ready = time.perf_counter() - t0
+
+            with connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as ws:
+                msg = BackMsg()
+                msg.rerun_script.query_string = ""
+                msg.rerun_script.page_script_hash = ""
+                sent = time.perf_counter()
+                ws.send(msg.SerializeToString())
+                first_paint = None
+                while True:
+                    fwd = ForwardMsg()
+                    fwd.ParseFromString(ws.recv(timeout=RENDER_TIMEOUT_S))
+                    kind = fwd.WhichOneof("type")
+                    if kind == "delta" and first_paint is None:
+                        first_paint = time.perf_counter() - sent
+                    if kind == "script_finished":
+                        full_render = time.perf_counter() - sent
+                        break
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {"ready_s": ready, "first_paint_s": first_paint or full_render, "full_render_s": full_render}
+
+
+def main(argv: List[str] = None) -> int:
+    p = argparse.ArgumentParser(description="MajorPass cold-start (time-to-first-paint) benchmark")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--json", default="", help="결과를 JSON으로 저장")
+    args = p.parse_args(argv)
+    if importlib.util.find_spec("websockets") is None:
+        raise SystemExit("bench/startup.py needs the websockets package: pip install websockets")
+
+    runs = []
+    for i in range(args.runs):
+        r = cold_start()
+        runs.append(r)
+        print(f"run {i + 1}: ready {r['ready_s']:.3f}s  first_paint {r['first_paint_s']:.3f}s  full_render {r['full_render_s']:.3f}s")
+    summary = {k: round(statistics.median(r[k] for r in runs), 3) for k in runs[0]}
+    print("median: " + "  ".join(f"{k} {v:.3f}s" for k, v in summary.items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "median": summary}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
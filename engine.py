@@ -0,0 +1,2467 @@
+# MajorPass 엔진: Naver 검색/Datalab, 본문 추출, 트렌드 저장소, LLM 호출.
+# Streamlit에 의존하지 않으므로 app.py(UI)와 batch.py(헤드리스 일괄 처리)가 함께 쓴다.
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from html import unescape
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+# 무거운 라이브러리(requests, trafilatura, openai, tiktoken)는 처음 쓰는 함수 안에서 import 한다.
+# 여기서는 설치 여부만 확인해 앱 셸이 먼저 그려지게 한다(openai만 ~1s, trafilatura+lxml ~0.3s).
+if TYPE_CHECKING:
+    import requests
+    from openai import OpenAI
+
+# Optional OpenAI (LLM)
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+# Optional tiktoken (정확한 토큰 수; 없으면 근사치 사용)
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+
+# =========================================================
+# HELPERS
+# =========================================================
+def now_str() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+def clean_html(text: str) -> str:
+    if not text:
+        return ""
+    text = re.sub(r"<[^>]+>", "", text)
+    text = text.replace("&quot;", '"').replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def clamp_text(s: str, max_chars: int = 3500) -> str:
+    s = (s or "").strip()
+    if len(s) <= max_chars:
+        return s
+    return s[:max_chars] + "…"
+
+
+def llm_enabled(openai_key: str) -> bool:
+    return OPENAI_AVAILABLE and bool((openai_key or "").strip())
+
+
+# =========================================================
+# PROCESS-WIDE CACHES (st.cache_resource / st.cache_data 대체)
+# =========================================================
+def singleton(fn: Callable[[], Any]) -> Callable[[], Any]:
+    # 프로세스당 한 번만 만드는 공유 객체(풀, 저장소, 게이트웨이). 첫 호출 경쟁은 락으로 막는다.
+    lock = threading.Lock()
+    box: List[Any] = []
+
+    @functools.wraps(fn)
+    def get() -> Any:
+        if not box:
+            with lock:
+                if not box:
+                    box.append(fn())
+        return box[0]
+
+    get.clear = box.clear  # type: ignore[attr-defined]
+    # peek: 새로 만들지 않고 현재 인스턴스(없으면 None)만 본다
+    get.peek = lambda: box[0] if box else None  # type: ignore[attr-defined]
+    return get
+
+
+# =========================================================
+# TRACING (hot-path spans → p50/p95, Chrome trace)
+# =========================================================
+TRACE_ENABLED = os.getenv("MAJORPASS_TRACE", "1") != "0"
+TRACE_MAX_SPANS = 20000
+
+
+class Tracer:
+    # 끝난 구간(span)을 링 버퍼에 모은다: (name, cat, start, dur, tid, thread name, attrs).
+    # attrs에는 캐시 적중(hit) 같은 플래그를 담는다. 쿼리/키 같은 사용자 입력은 넣지 않는다.
+    def __init__(self, max_spans: int = TRACE_MAX_SPANS):
+        self._spans: "deque[Tuple[str, str, float, float, int, str, Dict[str, Any]]]" = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def record(self, name: str, cat: str, start: float, end: float, attrs: Optional[Dict[str, Any]] = None) -> None:
+        t = threading.current_thread()
+        with self._lock:
+            self._spans.append((name, cat, start, end - start, t.ident or 0, t.name, attrs or {}))
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        if not TRACE_ENABLED:
+            yield attrs
+            return
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, cat, start, time.perf_counter(), attrs)
+
+    def snapshot(self) -> List[Tuple[str, str, float, float, int, str, Dict[str, Any]]]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def stats(self) -> pd.DataFrame:
+        # 이름별 호출 수, p50/p95/max(ms), 캐시 적중률(hit 플래그가 있는 span만)
+        spans = self.snapshot()
+        if not spans:
+            return pd.DataFrame()
+        groups: Dict[Tuple[str, str], List[Tuple[float, Any]]] = {}
+        for name, cat, _, dur, _, _, attrs in spans:
+            groups.setdefault((cat, name), []).append((dur * 1000.0, attrs.get("hit")))
+        rows = []
+        for (cat, name), items in groups.items():
+            ms = np.array([d for d, _ in items])
+            hits = [h for _, h in items if h is not None]
+            rows.append(
+                {
+                    "stage": name,
+                    "cat": cat,
+                    "n": len(items),
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "max_ms": float(ms.max()),
+                    "total_s": float(ms.sum() / 1000.0),
+                    "hit_rate": sum(bool(h) for h in hits) / len(hits) if hits else np.nan,
+                }
+            )
+        return pd.DataFrame(rows).sort_values("total_s", ascending=False, ignore_index=True).round(3)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        # chrome://tracing, ui.perfetto.dev 에서 열 수 있는 Trace Event Format(JSON)
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        threads: Dict[int, str] = {}
+        for name, cat, start, dur, tid, tname, attrs in self.snapshot():
+            threads[tid] = tname
+            events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": round((start - self._t0) * 1e6, 1),
+                    "dur": round(dur * 1e6, 1),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {k: v if isinstance(v, (bool, int, float, str)) or v is None else str(v) for k, v in attrs.items()},
+                }
+            )
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}} for tid, tname in threads.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+@singleton
+def tracer() -> Tracer:
+    return Tracer()
+
+
+def span(name: str, cat: str, **attrs: Any) -> Any:
+    return tracer().span(name, cat, **attrs)
+
+
+def traced(cat: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    # 함수 전체를 하나의 span으로 잰다(제너레이터에는 쓰지 않는다: 생성 시점만 잡힌다).
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(fn.__name__, cat):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# =========================================================
+# SHARED CACHE (cross-process, TTL)
+# =========================================================
+# st.cache_data는 프로세스마다 따로라서 레플리카/재시작마다 같은 Naver 호출을 반복한다.
+# 같은 노드의 모든 워커가 CACHE_DIR의 SQLite(WAL)를 함께 읽고 쓴다. MAJORPASS_CACHE_BACKEND=memory면 프로세스 내부 캐시.
+CACHE_DIR = os.getenv("MAJORPASS_CACHE_DIR", ".cache")
+CACHE_BACKEND = os.getenv("MAJORPASS_CACHE_BACKEND", "sqlite")
+SHARED_CACHE_PATH = os.path.join(CACHE_DIR, "shared.sqlite")
+SHARED_CACHE_MAX_BYTES = int(os.getenv("MAJORPASS_SHARED_CACHE_BYTES", str(128 * 1024 * 1024)))
+SHARED_CACHE_PURGE_EVERY = 200  # set 이만큼마다 만료/용량 정리
+
+
+def encode_value(value: Any) -> bytes:
+    # DataFrame → Parquet(열 단위 압축, dtype/인덱스 보존), 튜플 → 길이 접두 프레임, 나머지 → JSON
+    if isinstance(value, pd.DataFrame):
+        buf = io.BytesIO()
+        value.to_parquet(buf, index=True)
+        return b"P" + buf.getvalue()
+    if isinstance(value, tuple):
+        parts = [encode_value(v) for v in value]
+        return b"T" + struct.pack(">I", len(parts)) + b"".join(struct.pack(">I", len(p)) + p for p in parts)
+    return b"J" + json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def decode_value(data: bytes) -> Any:
+    tag, body = data[:1], memoryview(data)[1:]
+    if tag == b"P":
+        df = pd.read_parquet(io.BytesIO(body))
+        df.columns.name = None
+        return df
+    if tag == b"T":
+        (n,), pos, parts = struct.unpack_from(">I", body), 4, []
+        for _ in range(n):
+            (size,) = struct.unpack_from(">I", body, pos)
+            parts.append(decode_value(bytes(body[pos + 4 : pos + 4 + size])))
+            pos += 4 + size
+        return tuple(parts)
+    return json.loads(bytes(body).decode("utf-8"))
+
+
+class MemoryCacheBackend:
+    # 프로세스 내부(이전 동작). 값은 bytes로 저장하므로 호출 측이 결과를 고쳐도 캐시는 그대로다.
+    def __init__(self, max_bytes: int = SHARED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] < time.time():
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            self._bytes -= len(old[1]) if old else 0
+            self._items[key] = (time.time() + ttl_s, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._items:
+                self._bytes -= len(self._items.popitem(last=False)[1][1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+class SQLiteCacheBackend:
+    # key(해시) -> (값 bytes, 만료 시각, 최근 접근). WAL이라 여러 프로세스가 읽는 동안에도 쓸 수 있고,
+    # 쓰기 경합은 busy_timeout으로 기다린다. 만료/용량 정리는 SHARED_CACHE_PURGE_EVERY번 쓸 때마다 한 번.
+    def __init__(self, path: str = SHARED_CACHE_PATH, max_bytes: int = SHARED_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,
+                expires_at REAL NOT NULL, accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires_at);
+            CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at);
+            """
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, now)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_s: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache(key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl_s, now),
+            )
+            self._writes += 1
+            if self._writes % SHARED_CACHE_PURGE_EVERY == 0:
+                self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        self._db.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache")
+
+
+@singleton
+def cache_backend() -> Any:
+    if CACHE_BACKEND == "memory":
+        return MemoryCacheBackend()
+    return SQLiteCacheBackend()
+
+
+_cache_counts: Dict[str, List[int]] = {}  # namespace -> [hits, misses] (이 프로세스 기준)
+_cache_counts_lock = threading.Lock()
+
+
+def count_cache(namespace: str, hit: bool) -> None:
+    with _cache_counts_lock:
+        _cache_counts.setdefault(namespace, [0, 0])[0 if hit else 1] += 1
+
+
+def cache_stats() -> pd.DataFrame:
+    with _cache_counts_lock:
+        rows = [
+            {"cache": ns, "hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else np.nan}
+            for ns, (h, m) in sorted(_cache_counts.items())
+        ]
+    return pd.DataFrame(rows)
+
+
+def _cache_get(key: str, sp: Dict[str, Any]) -> Optional[bytes]:
+    # 공유 캐시 오류("database is locked", 디스크 문제)는 호출을 실패시키지 않는다: 읽기 실패 = miss.
+    try:
+        return cache_backend().get(key)
+    except (sqlite3.Error, OSError) as e:
+        sp["cache_error"] = f"get: {e}"
+        return None
+
+
+def _cache_set(key: str, data: bytes, ttl_s: float, sp: Dict[str, Any]) -> None:
+    # 쓰기 실패는 이번 결과만 캐시하지 않고 넘어간다.
+    try:
+        cache_backend().set(key, data, ttl_s)
+    except (sqlite3.Error, OSError) as e:
+        sp["cache_error"] = f"set: {e}"
+
+
+def ttl_cache(ttl_s: float, cat: str = "cache") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    # 인자 -> 결과를 cache_backend()에 TTL로 저장. 키는 함수 이름 + 인자의 SHA-256이라
+    # 공유 파일에 API 키나 검색어가 그대로 남지 않는다. 같은 프로세스에서 동시에 들어온
+    # 같은 키 호출은 첫 호출 결과를 함께 기다린다(single-flight). 호출마다 span에 hit 플래그를 단다.
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        inflight: Dict[str, Future] = {}
+        lock = threading.Lock()
+        namespace = fn.__name__
+
+        @functools.wraps(fn)
+        def cached(*args: Any, **kwargs: Any) -> Any:
+            raw = json.dumps([namespace, args, kwargs], ensure_ascii=False, sort_keys=True, default=str)
+            key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+            with span(namespace, cat) as sp:
+                data = _cache_get(key, sp)
+                if data is not None:
+                    sp["hit"] = True
+                    count_cache(namespace, True)
+                    return decode_value(data)
+                with lock:
+                    fut = inflight.get(key)
+                    owner = fut is None
+                    if owner:
+                        fut = inflight[key] = Future()
+                sp["hit"] = not owner
+                count_cache(namespace, not owner)
+                if not owner:
+                    return decode_value(fut.result())
+                try:
+                    data = encode_value(fn(*args, **kwargs))
+                    _cache_set(key, data, ttl_s, sp)
+                    fut.set_result(data)
+                except BaseException as e:
+                    fut.set_exception(e)
+                    raise
+                finally:
+                    with lock:
+                        inflight.pop(key, None)
+                return decode_value(data)
+
+        return cached
+
+    return decorator
+
+
+# =========================================================
+# HTTP TRANSPORT (pooled keep-alive + retry)
+# =========================================================
+HTTP_POOL_HOSTS = 32
+HTTP_POOL_PER_HOST = 16
+HTTP_USER_AGENT = "Mozilla/5.0"
+
+
+@singleton
+def http_session() -> "requests.Session":
+    # 프로세스 전체(모든 세션/rerun)가 공유하는 Session: 호스트별 커넥션 풀 + keep-alive.
+    # 5xx/429는 지터 포함 지수 백오프로 재시도하고 Retry-After 헤더를 따른다.
+    # Datalab POST는 조회 전용(부작용 없음)이라 재시도 대상에 포함한다.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.4,
+        backoff_jitter=0.3,
+        backoff_max=8,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_PER_HOST, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": HTTP_USER_AGENT})
+    return session
+
+
+# =========================================================
+# NAVER APIs
+# =========================================================
+def naver_headers(client_id: str, client_secret: str) -> Dict[str, str]:
+    return {"X-Naver-Client-Id": client_id.strip(), "X-Naver-Client-Secret": client_secret.strip()}
+
+
+NAVER_API_BASE = os.getenv("MAJORPASS_NAVER_API_BASE", "https://openapi.naver.com").rstrip("/")  # bench/ 가짜 서버용
+NAVER_QPS = float(os.getenv("MAJORPASS_NAVER_QPS", "10"))  # 검색 + Datalab 합산, 0이면 제한 없음
+
+
+class Throttle:
+    # 프로세스 전체 호출 간격을 1/rate초 이상으로 벌린다(스레드 안전, 대기는 락 밖에서).
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + 1.0 / self.rate
+        if at > now:
+            with span("naver_throttle", "wait"):
+                time.sleep(at - now)
+
+
+@singleton
+def naver_throttle() -> Throttle:
+    return Throttle(NAVER_QPS)
+
+
+NAVER_SEARCH_PAGE = 100  # display 최대값
+NAVER_SEARCH_MAX_START = 1000  # start 최대값
+NAVER_SEARCH_WORKERS = 4
+
+
+def _search_rows(items: List[Dict[str, Any]], category: str) -> List[Dict[str, Any]]:
+    rows = []
+    for it in items:
+        rows.append(
+            {
+                "Select": False,
+                "Title": clean_html(it.get("title", "")),
+                "Snippet": clean_html(it.get("description", "")),
+                "Link": it.get("originallink") or it.get("link") or "",
+                "Published": it.get("pubDate") or "",
+                "Type": category,
+            }
+        )
+    return rows
+
+
+@ttl_cache(60 * 30, cat="naver")
+def naver_search_page(query: str, client_id: str, client_secret: str, category: str, start: int, sort: str) -> Tuple[pd.DataFrame, int]:
+    # 페이지 크기를 고정해 두어야 결과 수를 늘릴 때 이미 받은 페이지가 캐시에서 재사용된다.
+    url = f"{NAVER_API_BASE}/v1/search/{category}.json"
+    params = {"query": query, "display": NAVER_SEARCH_PAGE, "start": int(start), "sort": sort}
+    naver_throttle().wait()
+    res = http_session().get(url, headers=naver_headers(client_id, client_secret), params=params, timeout=15)
+    res.raise_for_status()
+    data = res.json()
+    return pd.DataFrame(_search_rows(data.get("items", []), category)), int(data.get("total", 0) or 0)
+
+
+def naver_search_pages(query: str, client_id: str, client_secret: str, category: str = "news", total: int = 10, sort: str = "sim") -> Iterator[pd.DataFrame]:
+    # 1페이지로 전체 건수를 확인한 뒤 나머지 페이지를 병렬 요청하고, 순서대로 yield 한다.
+    if not query.strip():
+        return
+    total = max(1, min(int(total), NAVER_SEARCH_MAX_START))
+    first, available = naver_search_page(query, client_id, client_secret, category, 1, sort)
+    total = min(total, available) if available else min(total, len(first))
+    yield first.head(total)
+
+    starts = list(range(1 + NAVER_SEARCH_PAGE, min(total, NAVER_SEARCH_MAX_START) + 1, NAVER_SEARCH_PAGE))
+    if not starts:
+        return
+    with ThreadPoolExecutor(max_workers=min(NAVER_SEARCH_WORKERS, len(starts)), thread_name_prefix="naver-page") as pool:
+        futures = [pool.submit(naver_search_page, query, client_id, client_secret, category, start, sort) for start in starts]
+        for start, fut in zip(starts, futures):
+            page, _ = fut.result()
+            if page.empty:
+                break
+            yield page.head(total - start + 1)
+
+
+@traced("naver")
+def naver_search(query: str, client_id: str, client_secret: str, category: str = "news", display: int = 10, sort: str = "sim") -> pd.DataFrame:
+    frames = [f for f in naver_search_pages(query, client_id, client_secret, category, display, sort) if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset="Link", ignore_index=True)
+
+
+NAVER_SEARCH_CATEGORIES = ("news", "blog", "webkr")
+RRF_K = 60
+
+
+def fuse_rrf(frames: Dict[str, pd.DataFrame], k: int = RRF_K) -> pd.DataFrame:
+    # Reciprocal-rank fusion: score = Σ 1/(k + rank). 여러 카테고리에 같은 링크가 있으면 한 행으로 합치고
+    # Type에 출처를 모두 남긴다(예: "news,blog").
+    parts = []
+    for cat, df in frames.items():
+        if df is None or df.empty:
+            continue
+        part = df.assign(_rank=range(1, len(df) + 1), _cat=cat)
+        parts.append(part[part["Link"].astype(bool)])
+    if not parts:
+        return pd.DataFrame()
+    long = pd.concat(parts, ignore_index=True)
+    long["_score"] = 1.0 / (k + long["_rank"])
+    long["_key"] = long["Link"].str.strip().str.rstrip("/")
+    long = long.sort_values("_rank", kind="stable")
+
+    agg = long.groupby("_key", sort=False).agg(
+        Select=("Select", "first"),
+        Title=("Title", "first"),
+        Snippet=("Snippet", "first"),
+        Link=("Link", "first"),
+        Published=("Published", "first"),
+        Type=("_cat", lambda c: ",".join(dict.fromkeys(c))),
+        _score=("_score", "sum"),
+    )
+    return agg.sort_values("_score", ascending=False, kind="stable").drop(columns="_score").reset_index(drop=True)
+
+
+def naver_search_all_pages(
+    query: str, client_id: str, client_secret: str, display: int = 10, sort: str = "sim"
+) -> Iterator[Tuple[pd.DataFrame, Dict[str, str]]]:
+    # news/blog/webkr를 동시에 검색하면서, 어느 카테고리든 페이지가 도착할 때마다
+    # (지금까지 받은 결과의 순위 융합 표, 카테고리별 오류)를 yield 한다. 마지막 yield가 최종 결과.
+    # 한 카테고리가 실패해도 나머지 결과는 그대로 쓴다.
+    arrivals: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+
+    def run(cat: str) -> None:
+        try:
+            for page in naver_search_pages(query, client_id, client_secret, cat, display, sort):
+                arrivals.put((cat, page))
+        except Exception as e:
+            arrivals.put((cat, e))
+        finally:
+            arrivals.put((cat, None))
+
+    pages: Dict[str, List[pd.DataFrame]] = {cat: [] for cat in NAVER_SEARCH_CATEGORIES}
+    errors: Dict[str, str] = {}
+
+    def fused() -> pd.DataFrame:
+        frames = {
+            cat: pd.concat(fs, ignore_index=True).drop_duplicates(subset="Link", ignore_index=True)
+            for cat, fs in pages.items()
+            if fs
+        }
+        return fuse_rrf(frames).head(int(display))
+
+    with ThreadPoolExecutor(max_workers=len(NAVER_SEARCH_CATEGORIES), thread_name_prefix="naver-fanout") as pool:
+        for cat in NAVER_SEARCH_CATEGORIES:
+            pool.submit(run, cat)
+        pending = len(NAVER_SEARCH_CATEGORIES)
+        while pending:
+            cat, item = arrivals.get()
+            if item is None:
+                pending -= 1
+            elif isinstance(item, Exception):
+                errors[cat] = f"{type(item).__name__}: {item}"
+            elif not item.empty:
+                pages[cat].append(item)
+                yield fused(), dict(errors)
+    yield fused(), dict(errors)
+
+
+@traced("naver")
+def naver_search_all(query: str, client_id: str, client_secret: str, display: int = 10, sort: str = "sim") -> pd.DataFrame:
+    # 모든 카테고리가 실패했을 때만 예외. 일부 실패는 나머지 결과로 대신한다.
+    result, errors = pd.DataFrame(), {}
+    for result, errors in naver_search_all_pages(query, client_id, client_secret, display, sort):
+        pass
+    if len(errors) == len(NAVER_SEARCH_CATEGORIES):
+        raise RuntimeError("Naver 검색 실패: " + "; ".join(f"{c}: {e}" for c, e in errors.items()))
+    return result
+
+
+@ttl_cache(60 * 60, cat="naver")
+def naver_datalab_trend(client_id: str, client_secret: str, start_date: str, end_date: str, time_unit: str, keyword_groups: List[Dict[str, Any]]) -> pd.DataFrame:
+    url = f"{NAVER_API_BASE}/v1/datalab/search"
+    body = {"startDate": start_date, "endDate": end_date, "timeUnit": time_unit, "keywordGroups": keyword_groups}
+    naver_throttle().wait()
+    res = http_session().post(
+        url,
+        headers={**naver_headers(client_id, client_secret), "Content-Type": "application/json"},
+        data=json.dumps(body, ensure_ascii=False),
+        timeout=20,
+    )
+    res.raise_for_status()
+    data = res.json()
+    results = data.get("results", [])
+    if not results:
+        return pd.DataFrame()
+
+    names = list(dict.fromkeys(g.get("title") or g.get("keyword") or "Group" for g in results))
+    long = pd.DataFrame(
+        [
+            (g.get("title") or g.get("keyword") or "Group", p.get("period"), p.get("ratio"))
+            for g in results
+            for p in g.get("data", [])
+        ],
+        columns=["Group", "Period", "ratio"],
+    ).dropna(subset=["Period", "ratio"])
+    df = (
+        long.astype({"ratio": float})
+        .pivot_table(index="Period", columns="Group", values="ratio", aggfunc="last")
+        .reindex(columns=names)
+        .sort_index()
+    )
+    df.columns.name = None
+    df.index.name = "Period"
+    return df
+
+
+DATALAB_MAX_GROUPS = 5
+DATALAB_WORKERS = 4
+
+
+@traced("naver")
+def naver_datalab_trend_many(
+    client_id: str,
+    client_secret: str,
+    start_date: str,
+    end_date: str,
+    time_unit: str,
+    keywords: List[str],
+    anchor: Optional[str] = None,
+) -> pd.DataFrame:
+    # Datalab은 요청당 5개 그룹, ratio는 요청 내부 최대값 기준(0~100)이다.
+    # 모든 청크에 같은 anchor 키워드를 넣어 병렬 요청한 뒤, 각 청크의 anchor 합이
+    # 첫 청크의 anchor 합과 같아지도록 배율을 맞추고 전체를 다시 0~100으로 정규화한다.
+    keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+    if not keywords:
+        return pd.DataFrame()
+
+    def _fetch(kws: List[str]) -> pd.DataFrame:
+        groups = [{"groupName": k, "keywords": [k]} for k in kws]
+        return naver_datalab_trend(client_id, client_secret, start_date, end_date, time_unit, groups)
+
+    if len(keywords) <= DATALAB_MAX_GROUPS:
+        return _fetch(keywords)
+
+    anchor = anchor if anchor in keywords else keywords[0]
+    others = [k for k in keywords if k != anchor]
+    size = DATALAB_MAX_GROUPS - 1
+    chunks = [others[i : i + size] for i in range(0, len(others), size)]
+    with ThreadPoolExecutor(max_workers=min(DATALAB_WORKERS, len(chunks)), thread_name_prefix="datalab") as pool:
+        frames = list(pool.map(lambda c: _fetch([anchor, *c]), chunks))
+
+    ref_total = float(frames[0][anchor].sum()) if anchor in frames[0] else 0.0
+    if ref_total <= 0:
+        raise ValueError(f"anchor 키워드 '{anchor}'의 검색량이 0이라 청크를 비교할 수 없습니다. 다른 anchor를 선택하세요.")
+    scaled = [frames[0]]
+    for frame in frames[1:]:
+        total = float(frame[anchor].sum()) if anchor in frame else 0.0
+        if total <= 0:
+            raise ValueError(f"anchor 키워드 '{anchor}'가 일부 청크에서 0입니다. 다른 anchor를 선택하세요.")
+        scaled.append(frame.drop(columns=anchor) * (ref_total / total))
+
+    out = pd.concat(scaled, axis=1).sort_index()
+    peak = float(out.max().max())
+    if peak > 0:
+        out = out * (100.0 / peak)
+    return out.reindex(columns=[k for k in keywords if k in out.columns]).round(5)
+
+
+# =========================================================
+# EXTRACTION (no key)
+# =========================================================
+ARTICLE_DB_PATH = os.path.join(CACHE_DIR, "articles.sqlite")
+ARTICLE_FRESH_S = 60 * 60
+ARTICLE_MAX_BYTES = int(os.getenv("MAJORPASS_ARTICLE_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+class ArticleStore:
+    # URL -> (본문 해시, ETag, Last-Modified) 와 해시 -> (압축 HTML, 압축 추출 텍스트)를 분리 저장.
+    # 같은 HTML은 한 번만 저장/추출되고, 총 바이트가 max_bytes를 넘으면 LRU 순으로 비운다.
+    def __init__(self, path: str, max_bytes: int = ARTICLE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY, html BLOB, text BLOB, size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY, hash TEXT NOT NULL, etag TEXT, last_modified TEXT,
+                fetched_at REAL NOT NULL, accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS urls_accessed ON urls(accessed_at);
+            """
+        )
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT u.hash, u.etag, u.last_modified, u.fetched_at, b.text FROM urls u "
+                "JOIN blobs b ON b.hash = u.hash WHERE u.url = ?",
+                (url,),
+            ).fetchone()
+            if not row:
+                return None
+            self._db.execute("UPDATE urls SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        h, etag, last_modified, fetched_at, text_z = row
+        return {
+            "hash": h,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "text": zlib.decompress(text_z).decode("utf-8") if text_z is not None else None,
+        }
+
+    def text_for_hash(self, h: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT text FROM blobs WHERE hash = ?", (h,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def revalidated(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE urls SET fetched_at = ?, accessed_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now, etag, last_modified, url),
+            )
+
+    def put(self, url: str, html: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        h = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        html_z = zlib.compress(html.encode("utf-8"), 6)
+        text_z = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs(hash, html, text, size) VALUES (?, ?, ?, ?)",
+                    (h, html_z, text_z, len(html_z) + len(text_z)),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO urls(url, hash, etag, last_modified, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, h, etag, last_modified, now, now),
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        self._db.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM urls)")
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT u.url, u.hash, b.size FROM urls u JOIN blobs b ON b.hash = u.hash ORDER BY u.accessed_at"
+        ).fetchall()
+        for url, h, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM urls WHERE url = ?", (url,))
+            if not self._db.execute("SELECT 1 FROM urls WHERE hash = ? LIMIT 1", (h,)).fetchone():
+                self._db.execute("DELETE FROM blobs WHERE hash = ?", (h,))
+                total -= size
+
+
+@singleton
+def article_store() -> ArticleStore:
+    return ArticleStore(ARTICLE_DB_PATH)
+
+
+# 다운로드 상한(압축 해제 후 바이트). 본문은 앞쪽에 있으므로 넘치면 앞부분만 쓴다.
+ARTICLE_MAX_DOWNLOAD = int(os.getenv("MAJORPASS_ARTICLE_MAX_DOWNLOAD", str(2 * 1024 * 1024)))
+ARTICLE_CHUNK = 64 * 1024
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# Content-Type만으로 판단할 수 없는 경우 → 첫 청크를 보고 결정
+AMBIGUOUS_TYPES = ("", "text/plain", "application/octet-stream", "binary/octet-stream")
+CHARSET_ALIASES = {"euc-kr": "cp949", "euckr": "cp949", "ks_c_5601-1987": "cp949", "x-windows-949": "cp949"}
+
+# 빠른 경로: <article>/<main> 안(없으면 문서 전체)의 <p> 문단만 모은다. 충분하면 trafilatura를 건너뛴다.
+FAST_MIN_CHARS = 600
+FAST_MIN_PARAGRAPHS = 3
+FAST_MIN_PARAGRAPH_CHARS = 40
+
+# trafilatura(lxml + 파이썬 휴리스틱)는 GIL을 오래 잡으므로 별도 프로세스에서 돌린다. 0이면 호출 스레드에서 실행.
+EXTRACT_PROCESSES = int(os.getenv("MAJORPASS_EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+EXTRACT_CPU_TIMEOUT_S = 10.0
+EXTRACT_RECYCLE_AFTER = 2  # 연속 타임아웃이 이만큼이면 멈춘 워커째로 풀을 새로 만든다
+
+_RE_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_\-]+)""", re.I)
+_RE_DROP_BLOCKS = re.compile(r"<(script|style|noscript|nav|footer|aside|form|figcaption)\b[^>]*>.*?</\1\s*>", re.I | re.S)
+_RE_MAIN_BLOCK = re.compile(r"<(article|main)\b[^>]*>(.*)</\1\s*>", re.I | re.S)
+_RE_PARAGRAPH = re.compile(r"<p\b[^>]*>(.*?)</p\s*>", re.I | re.S)
+_RE_TAG = re.compile(r"<[^>]+>")
+
+
+def _sniff_html(head: bytes) -> bool:
+    if head.startswith(b"%PDF") or b"\x00" in head[:1024]:
+        return False
+    h = head[:4096].lower()
+    return any(tag in h for tag in (b"<!doctype html", b"<html", b"<head", b"<body", b"<p", b"<div"))
+
+
+def _decode_html(body: bytes, content_type: str) -> str:
+    # 헤더 charset → <meta charset> → utf-8 → cp949(국내 언론사 EUC-KR 페이지) 순서로 시도
+    candidates = []
+    m = re.search(r"charset=\s*[\"']?([\w\-]+)", content_type, re.I)
+    if m:
+        candidates.append(m.group(1))
+    m = _RE_META_CHARSET.search(body[:4096])
+    if m:
+        candidates.append(m.group(1).decode("ascii", "ignore"))
+    for enc in candidates + ["utf-8", "cp949"]:
+        enc = CHARSET_ALIASES.get(enc.lower(), enc)
+        try:
+            return body.decode(enc)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return body.decode("utf-8", errors="replace")
+
+
+def _read_html(r: "requests.Response", sp: Dict[str, Any]) -> Optional[str]:
+    # HTML이 아니면 None(본문은 받지 않고 연결을 닫는다). 상한을 넘으면 앞부분만 쓴다.
+    content_type = r.headers.get("Content-Type", "")
+    mime = content_type.split(";")[0].strip().lower()
+    if mime not in HTML_TYPES and mime not in AMBIGUOUS_TYPES:
+        sp["content_type"] = mime
+        return None
+    chunks: List[bytes] = []
+    size = 0
+    for chunk in r.iter_content(ARTICLE_CHUNK):
+        if not chunks and mime in AMBIGUOUS_TYPES and not _sniff_html(chunk):
+            sp["content_type"] = mime or "unknown"
+            return None
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= ARTICLE_MAX_DOWNLOAD:
+            sp["truncated"] = True
+            break
+    sp["bytes"] = min(size, ARTICLE_MAX_DOWNLOAD)
+    return _decode_html(b"".join(chunks)[:ARTICLE_MAX_DOWNLOAD], content_type)
+
+
+@traced("cpu")
+def _fast_extract(html: str) -> Optional[str]:
+    body = _RE_DROP_BLOCKS.sub(" ", html)
+    m = _RE_MAIN_BLOCK.search(body)
+    scope = m.group(2) if m else body
+    paragraphs = []
+    for p in _RE_PARAGRAPH.findall(scope):
+        text = re.sub(r"\s+", " ", unescape(_RE_TAG.sub(" ", p))).strip()
+        if len(text) >= FAST_MIN_PARAGRAPH_CHARS:
+            paragraphs.append(text)
+    text = "\n\n".join(paragraphs)
+    if len(paragraphs) < FAST_MIN_PARAGRAPHS or len(text) < FAST_MIN_CHARS:
+        return None
+    return text
+
+
+def _warm_extractor() -> None:
+    importlib.import_module("trafilatura")  # 워커 시작 시 한 번만 import
+
+
+def _trafilatura_extract(html: str) -> str:
+    import trafilatura  # 본문 추출 (키 필요 없음), lxml 포함 첫 import가 무겁다
+
+    return trafilatura.extract(html) or ""
+
+
+@singleton
+def extract_pool() -> Optional[ProcessPoolExecutor]:
+    if EXTRACT_PROCESSES <= 0:
+        return None
+    # fork는 스레드(Streamlit 서버, 잡 풀)가 있는 프로세스에서 안전하지 않으므로 spawn
+    return ProcessPoolExecutor(
+        max_workers=EXTRACT_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_extractor,
+    )
+
+
+_extract_timeouts = {"count": 0}
+_extract_recycle_lock = threading.Lock()
+
+
+def _recycle_extract_pool(pool: ProcessPoolExecutor) -> None:
+    # 타임아웃 난 작업은 cancel()로 멈추지 않으므로 워커 프로세스를 직접 끝내고 다음 호출에서 새 풀을 만든다.
+    with _extract_recycle_lock:
+        if extract_pool.peek() is pool:
+            extract_pool.clear()
+        _extract_timeouts["count"] = 0
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        proc.terminate()
+
+
+@traced("cpu")
+def _run_trafilatura(html: str) -> str:
+    pool = extract_pool()
+    if pool is None:
+        return _trafilatura_extract(html)
+    fut = pool.submit(_trafilatura_extract, html)
+    try:
+        text = fut.result(timeout=EXTRACT_CPU_TIMEOUT_S)
+        _extract_timeouts["count"] = 0
+        return text
+    except FutureTimeout:
+        # 아직 대기 중이면 취소되고, 이미 실행 중이면 워커가 계속 잡고 있다 → 반복되면 풀을 갈아엎는다.
+        fut.cancel()
+        with _extract_recycle_lock:
+            _extract_timeouts["count"] += 1
+            recycle = _extract_timeouts["count"] >= EXTRACT_RECYCLE_AFTER
+        if recycle:
+            _recycle_extract_pool(pool)
+        return ""
+    except BrokenProcessPool:
+        # 워커가 죽었으면 다음 호출에서 새 풀을 만들고, 이번 건은 여기서 처리
+        extract_pool.clear()
+        return _trafilatura_extract(html)
+
+
+@traced("cpu")
+def _extract_main_text(html: str) -> str:
+    extracted = _fast_extract(html)
+    if extracted is None:
+        extracted = _run_trafilatura(html)
+    return re.sub(r"\n{3,}", "\n\n", extracted).strip()
+
+
+def fetch_and_extract_text(url: str) -> str:
+    if not url:
+        return ""
+    with span("fetch_and_extract_text", "extract", host=urlparse(url).hostname or "") as sp:
+        text = _fetch_and_extract(url, sp)
+        count_cache("fetch_and_extract_text", bool(sp.get("hit")))
+        return text
+
+
+def _fetch_and_extract(url: str, sp: Dict[str, Any]) -> str:
+    # sp["cache"]: fresh(저장본 그대로) / 304(재검증) / same_html(추출 생략) / miss / skipped(HTML 아님) / error
+    store = article_store()
+    cached = store.get(url)
+    if cached and cached["text"] is not None and time.time() - cached["fetched_at"] < ARTICLE_FRESH_S:
+        sp.update(hit=True, cache="fresh")
+        return cached["text"]
+
+    headers = {}
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        with span("http_get", "network", host=sp["host"]) as hp:
+            with http_session().get(url, timeout=15, headers=headers, stream=True) as r:
+                hp["status"] = r.status_code
+                if r.status_code == 304 and cached:
+                    store.revalidated(url, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+                    sp.update(hit=True, cache="304")
+                    return cached["text"] or ""
+                r.raise_for_status()
+                html = _read_html(r, hp)
+                etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if html is None:
+            # PDF·이미지 등은 받지 않는다. 빈 본문으로 저장해 신선한 동안 다시 요청하지 않는다.
+            sp.update(hit=False, cache="skipped")
+            store.put(url, "", "", etag, last_modified)
+            return ""
+        # 내용이 바뀌지 않았으면(같은 해시) 본문 추출을 다시 하지 않는다.
+        extracted = store.text_for_hash(hashlib.sha256(html.encode("utf-8")).hexdigest())
+        sp.update(hit=extracted is not None, cache="same_html" if extracted is not None else "miss")
+        if extracted is None:
+            extracted = _extract_main_text(html)
+        store.put(url, html, extracted, etag, last_modified)
+        return extracted
+    except Exception:
+        sp.update(hit=False, cache="error")
+        return (cached or {}).get("text") or ""
+
+
+EXTRACT_DEADLINE_S = 20.0
+EXTRACT_PER_HOST = 2
+
+_host_locks: Dict[str, threading.BoundedSemaphore] = {}
+_host_locks_guard = threading.Lock()
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = (urlparse(url).hostname or "").lower()
+    with _host_locks_guard:
+        if host not in _host_locks:
+            _host_locks[host] = threading.BoundedSemaphore(EXTRACT_PER_HOST)
+        return _host_locks[host]
+
+
+@traced("extract")
+def extract_many(urls: List[str], deadline_s: float = EXTRACT_DEADLINE_S) -> Dict[str, str]:
+    # 여러 URL 본문을 동시에 추출. 같은 호스트는 EXTRACT_PER_HOST개까지만 동시 접속,
+    # deadline_s 안에 끝나지 않은 URL은 결과에서 빠진다(호출 측에서 Snippet으로 대체).
+    urls = [u for u in dict.fromkeys(urls) if u]
+    if not urls:
+        return {}
+    until = time.monotonic() + deadline_s
+
+    def _one(url: str) -> str:
+        slot = _host_slot(url)
+        if not slot.acquire(timeout=max(0.0, until - time.monotonic())):
+            return ""
+        try:
+            if time.monotonic() >= until:
+                return ""
+            return fetch_and_extract_text(url)
+        finally:
+            slot.release()
+
+    pool = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="extract")
+    futures = {pool.submit(_one, u): u for u in urls}
+    done, _ = wait(futures, timeout=deadline_s)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    out: Dict[str, str] = {}
+    for f in done:
+        try:
+            out[futures[f]] = f.result()
+        except Exception:
+            out[futures[f]] = ""
+    return out
+
+
+# =========================================================
+# TREND STORE (incremental, Parquet)
+# =========================================================
+TREND_STORE_DIR = os.path.join(CACHE_DIR, "trends")
+TREND_FRESH_S = 6 * 60 * 60  # 진행 중인(미완성) 기간 값을 재사용하는 시간
+TREND_OVERLAP_DAYS = {"date": 7, "week": 28, "month": 92}
+
+
+def _snap_period(d: date, time_unit: str) -> date:
+    # 요청 시작일을 기간 경계에 맞춰야 저장된 period 라벨과 새 응답의 라벨이 일치한다.
+    if time_unit == "month":
+        return d.replace(day=1)
+    if time_unit == "week":
+        return d - timedelta(days=d.weekday())
+    return d
+
+
+def _complete_until(today: date, time_unit: str) -> date:
+    # 마지막으로 "끝난" 기간의 마지막 날. 이후 기간 값은 아직 바뀔 수 있다.
+    return _snap_period(today, time_unit) - timedelta(days=1)
+
+
+@contextlib.contextmanager
+def _interprocess_lock(path: str, timeout_s: float = 60.0) -> Iterator[None]:
+    # 같은 노드의 다른 레플리카/배치 프로세스와 공유하는 쓰기 락. SQLite의 RESERVED 락(BEGIN IMMEDIATE)을
+    # 뮤텍스로 쓴다: 플랫폼과 상관없이 동작하고 프로세스가 죽으면 OS가 풀어 준다.
+    db = sqlite3.connect(path, timeout=timeout_s, isolation_level=None)
+    try:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        finally:
+            db.execute("ROLLBACK")
+    finally:
+        db.close()
+
+
+class TrendStore:
+    # time_unit별 Parquet(keyword, period, ratio) + 키워드별 커버리지(JSON).
+    # 저장된 값은 time_unit마다 하나의 공통 스케일을 유지한다: 새로 받은 구간은 이미 저장된
+    # anchor 키워드와 겹치는 완성 기간의 합이 같아지도록 배율을 맞춘 뒤 이어 붙인다.
+    # 락은 파일 읽기/병합/저장에만 잡고, Datalab 호출은 락 밖에서 한다(같은 요청은 single-flight).
+    def __init__(self, root: str = TREND_STORE_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[Any, ...], Future] = {}
+
+    def _paths(self, time_unit: str) -> Tuple[str, str]:
+        return os.path.join(self.root, f"{time_unit}.parquet"), os.path.join(self.root, f"{time_unit}.json")
+
+    def _load(self, time_unit: str) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        # 커버리지를 먼저 읽는다: 저장 중인 다른 프로세스와 엇갈려도 "커버리지 ≤ 데이터"가 되어
+        # 최악의 경우 다시 받을 뿐, 없는 데이터를 있다고 믿지 않는다.
+        data_path, cov_path = self._paths(time_unit)
+        try:
+            with open(cov_path, encoding="utf-8") as f:
+                coverage = json.load(f)
+            return pd.read_parquet(data_path), coverage
+        except FileNotFoundError:
+            return pd.DataFrame({"keyword": pd.Series(dtype=str), "period": pd.Series(dtype=str), "ratio": pd.Series(dtype=float)}), {}
+
+    def _save(self, time_unit: str, long: pd.DataFrame, coverage: Dict[str, Dict[str, Any]]) -> None:
+        # 데이터 → 커버리지 순으로 원자적 교체(임시 파일 + os.replace)
+        data_path, cov_path = self._paths(time_unit)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        long.sort_values(["keyword", "period"]).reset_index(drop=True).to_parquet(data_path + suffix, index=False)
+        with open(cov_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(coverage, f, ensure_ascii=False)
+        os.replace(data_path + suffix, data_path)
+        os.replace(cov_path + suffix, cov_path)
+
+    @staticmethod
+    def _covered_end(cov: Dict[str, Any]) -> str:
+        return cov["end"] if time.time() - cov["fetched_at"] < TREND_FRESH_S else cov["stable_end"]
+
+    def _missing(self, coverage: Dict[str, Dict[str, Any]], keywords: List[str], start: str, end: str) -> List[str]:
+        return [
+            k for k in keywords
+            if k not in coverage or start < coverage[k]["start"] or end > self._covered_end(coverage[k])
+        ]
+
+    def query(
+        self,
+        client_id: str,
+        client_secret: str,
+        start_date: date,
+        end_date: date,
+        time_unit: str,
+        keywords: List[str],
+        anchor: Optional[str] = None,
+    ) -> pd.DataFrame:
+        keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+        if not keywords:
+            return pd.DataFrame()
+        start = _snap_period(start_date, time_unit).isoformat()
+        end = end_date.isoformat()
+
+        with span("trend_store.query", "trend") as sp:
+            with self._lock:
+                long, coverage = self._load(time_unit)
+            missing = self._missing(coverage, keywords, start, end)
+            sp.update(hit=not missing, missing=len(missing), keywords=len(keywords))
+            if missing:
+                plan = self._plan(start, end, time_unit, keywords, missing, long, coverage, anchor)
+                try:
+                    wide = self._fetch_once(client_id, client_secret, time_unit, plan)
+                except ValueError:
+                    # 저장된 기준 키워드로 청크를 이을 수 없음(검색량 0 등) → 아래 직접 조회로
+                    wide = None
+                merged = self._merge(time_unit, plan, wide) if wide is not None and not wide.empty else None
+                if merged is None:
+                    # 기존 스케일에 맞출 수 없음(anchor 검색량 0 등) → 저장하지 않고 이번 요청만 직접 조회
+                    return naver_datalab_trend_many(client_id, client_secret, start, end, time_unit, keywords, anchor)
+                long = merged
+
+        view = long[long["keyword"].isin(keywords) & (long["period"] >= start) & (long["period"] <= end)]
+        if view.empty:
+            return pd.DataFrame()
+        df = view.pivot_table(index="period", columns="keyword", values="ratio", aggfunc="last")
+        df = df.reindex(columns=[k for k in keywords if k in df.columns]).sort_index()
+        peak = float(df.max().max())
+        if peak > 0:
+            df = df * (100.0 / peak)
+        df.columns.name = None
+        df.index.name = "Period"
+        return df.round(5)
+
+    def _plan(
+        self,
+        start: str,
+        end: str,
+        time_unit: str,
+        keywords: List[str],
+        missing: List[str],
+        long: pd.DataFrame,
+        coverage: Dict[str, Dict[str, Any]],
+        anchor: Optional[str],
+    ) -> Dict[str, Any]:
+        # 누락 구간만 감싸는 창을 잡아 한 번(필요 시 청크 병렬)만 요청한다.
+        parts: List[Tuple[str, str]] = []
+        for k in missing:
+            cov = coverage.get(k)
+            if cov is None:
+                parts.append((start, end))
+                continue
+            if start < cov["start"]:
+                parts.append((start, (date.fromisoformat(cov["start"]) - timedelta(days=1)).isoformat()))
+            covered_end = self._covered_end(cov)
+            if end > covered_end:
+                nxt = _snap_period(date.fromisoformat(covered_end) + timedelta(days=1), time_unit)
+                parts.append((nxt.isoformat(), end))
+        ws, we = min(p[0] for p in parts), max(p[1] for p in parts)
+
+        # 스케일 기준(ref): 완성 기간이 저장된 키워드 중 요청 키워드 우선, 그다음 평균값이 큰 것.
+        stable = {k: c for k, c in coverage.items() if c["stable_end"] >= c["start"]}
+        ref = None
+        if stable:
+            means = long[long["keyword"].isin(list(stable))].groupby("keyword")["ratio"].mean()
+            ranked = sorted(stable, key=lambda k: (k != anchor, k not in keywords, -float(means.get(k, 0.0))))
+            ref = ranked[0]
+            rc = stable[ref]
+            overlap = timedelta(days=TREND_OVERLAP_DAYS.get(time_unit, 28))
+            if ws > rc["stable_end"]:
+                ws = max(rc["start"], _snap_period(date.fromisoformat(rc["stable_end"]) - overlap, time_unit).isoformat())
+            elif we < rc["start"]:
+                we = min(rc["stable_end"], (date.fromisoformat(rc["start"]) + overlap).isoformat())
+
+        fetch = list(dict.fromkeys([*missing, *([ref] if ref else [])]))
+        return {"time_unit": time_unit, "ws": ws, "we": we, "ref": ref, "fetch": fetch, "anchor": ref or anchor}
+
+    def _fetch_once(self, client_id: str, client_secret: str, time_unit: str, plan: Dict[str, Any]) -> pd.DataFrame:
+        # 같은 창·키워드 묶음을 동시에 요청하는 세션/워커는 한 번의 호출 결과를 함께 기다린다.
+        key = (time_unit, plan["ws"], plan["we"], tuple(plan["fetch"]), plan["anchor"])
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+        if not owner:
+            return fut.result()
+        try:
+            wide = naver_datalab_trend_many(client_id, client_secret, plan["ws"], plan["we"], time_unit, plan["fetch"], plan["anchor"])
+            fut.set_result(wide)
+            return wide
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _merge(self, time_unit: str, plan: Dict[str, Any], wide: pd.DataFrame) -> Optional[pd.DataFrame]:
+        # 받아 온 사이 다른 스레드/프로세스가 저장했을 수 있으므로 락 안에서 다시 읽고 병합한다.
+        with self._lock, _interprocess_lock(os.path.join(self.root, f"{time_unit}.lock")):
+            long, coverage = self._load(time_unit)
+            merged = self._apply(long, coverage, plan, wide)
+            if merged is None:
+                return None
+            self._save(time_unit, *merged)
+            return merged[0]
+
+    @staticmethod
+    def _apply(
+        long: pd.DataFrame, coverage: Dict[str, Dict[str, Any]], plan: Dict[str, Any], wide: pd.DataFrame
+    ) -> Optional[Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]]:
+        ws, we, ref = plan["ws"], plan["we"], plan["ref"]
+        if ref is None and coverage:
+            # 기준 없이 받은 사이 다른 쪽이 먼저 저장했다: 이미 다 덮여 있으면 그대로, 아니면 스케일을 맞출 수 없다.
+            if all(k in coverage and coverage[k]["start"] <= ws and coverage[k]["end"] >= we for k in plan["fetch"]):
+                return long, coverage
+            return None
+        factor = 1.0
+        if ref is not None:
+            old_ref = long[(long["keyword"] == ref) & (long["period"] <= coverage[ref]["stable_end"])].set_index("period")["ratio"]
+            overlap = old_ref.index.intersection(wide.index)
+            stored_sum, fetched_sum = float(old_ref.loc[overlap].sum()), float(wide.loc[overlap, ref].sum()) if ref in wide else 0.0
+            if stored_sum <= 0 or fetched_sum <= 0:
+                return None
+            factor = stored_sum / fetched_sum
+
+        stable_now = _complete_until(date.today(), plan["time_unit"]).isoformat()
+        new_rows = (
+            (wide * factor)
+            .rename_axis("period")
+            .reset_index()
+            .melt(id_vars="period", var_name="keyword", value_name="ratio")
+            .dropna(subset=["ratio"])
+        )
+        keep = pd.Series(True, index=long.index)
+        for k in new_rows["keyword"].unique():
+            cov = coverage.get(k)
+            # 저장된 완성 기간 값은 유지하고, 새 창 안의 미완성/누락 기간만 교체한다.
+            stale = (long["keyword"] == k) & (long["period"] >= ws) & (long["period"] <= we)
+            if cov is not None:
+                stale &= long["period"] > cov["stable_end"]
+            keep &= ~stale
+            existing = set(long.loc[(long["keyword"] == k) & keep, "period"])
+            new_rows = new_rows[~((new_rows["keyword"] == k) & new_rows["period"].isin(existing))]
+
+            if cov is None:
+                coverage[k] = {"start": ws, "end": we, "stable_end": min(we, stable_now), "fetched_at": time.time()}
+            else:
+                coverage[k] = {
+                    "start": min(cov["start"], ws),
+                    "end": max(cov["end"], we),
+                    "stable_end": max(cov["stable_end"], min(we, stable_now)),
+                    "fetched_at": time.time() if we >= cov["end"] else cov["fetched_at"],
+                }
+        long = pd.concat([long[keep], new_rows[["keyword", "period", "ratio"]]], ignore_index=True)
+        return long, coverage
+
+
+@singleton
+def trend_store() -> TrendStore:
+    return TrendStore()
+
+
+# =========================================================
+# TREND ANALYTICS (NumPy, full series)
+# =========================================================
+TREND_WINDOWS = {"date": (7, 14, 7), "week": (4, 8, 52), "month": (3, 6, 12)}  # (최근 구간, z-score 창, 계절 주기)
+TREND_Z_THRESHOLD = 2.5
+
+
+@traced("cpu")
+def trend_features(df: pd.DataFrame, time_unit: str) -> pd.DataFrame:
+    # 키워드(열)별 요약 신호를 한 번에 계산한다. 결측은 0으로 본다(Datalab의 "검색 없음").
+    recent, zwin, season = TREND_WINDOWS.get(time_unit, TREND_WINDOWS["week"])
+    y = np.nan_to_num(df.to_numpy(dtype=float))
+    n, k = y.shape
+    periods = np.asarray(df.index.astype(str))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.arange(n, dtype=float) - (n - 1) / 2.0
+        slope = (t @ (y - y.mean(axis=0))) / max(float(t @ t), 1e-9)
+
+        growth = (y[-1] - y[-2]) / y[-2] * 100 if n >= 2 else np.full(k, np.nan)
+        w = min(recent, n // 2)
+        if w > 0:
+            cur, prev = y[-w:].mean(axis=0), y[-2 * w : -w].mean(axis=0)
+            momentum = (cur - prev) / prev * 100
+        else:
+            momentum = np.full(k, np.nan)
+
+        # 직전 zwin 기간 대비 rolling z-score (누적합으로 창 평균/분산 계산)
+        anomalies = np.zeros(k, dtype=int)
+        last_anomaly = np.full(k, "", dtype=object)
+        if n > zwin:
+            c1 = np.vstack([np.zeros(k), np.cumsum(y, axis=0)])
+            c2 = np.vstack([np.zeros(k), np.cumsum(y * y, axis=0)])
+            mu = (c1[zwin:n] - c1[: n - zwin]) / zwin
+            var = (c2[zwin:n] - c2[: n - zwin]) / zwin - mu * mu
+            z = (y[zwin:] - mu) / np.sqrt(np.clip(var, 1e-9, None))
+            hits = np.abs(z) > TREND_Z_THRESHOLD
+            anomalies = hits.sum(axis=0)
+            has = hits.any(axis=0)
+            last_idx = (hits.shape[0] - 1 - np.argmax(hits[::-1], axis=0)) + zwin
+            last_anomaly = np.where(has, periods[last_idx], "")
+
+        # 계절성: 선형 추세를 뺀 뒤 주기(lag) 자기상관. 최소 두 주기가 있어야 계산한다.
+        if n >= 2 * season:
+            resid = y - y.mean(axis=0) - np.outer(t, slope)
+            a, b = resid[season:] - resid[season:].mean(axis=0), resid[:-season] - resid[:-season].mean(axis=0)
+            seasonality = (a * b).sum(axis=0) / np.sqrt((a * a).sum(axis=0) * (b * b).sum(axis=0))
+        else:
+            seasonality = np.full(k, np.nan)
+
+    peak_idx = y.argmax(axis=0)
+    out = pd.DataFrame(
+        {
+            "mean": y.mean(axis=0),
+            "slope_per_period": slope,
+            "last_change_%": growth,
+            f"last{w}_vs_prev{w}_%": momentum,
+            "peak_period": periods[peak_idx],
+            "peak": y[peak_idx, np.arange(k)],
+            "anomalies": anomalies,
+            "last_anomaly": last_anomaly,
+            f"seasonality_lag{season}": seasonality,
+        },
+        index=df.columns,
+    )
+    out.index.name = "Keyword"
+    return out.replace([np.inf, -np.inf], np.nan).round(3)
+
+
+def trend_correlations(df: pd.DataFrame, top: int = 5) -> List[Dict[str, Any]]:
+    if df.shape[1] < 2 or df.shape[0] < 3:
+        return []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.corrcoef(np.nan_to_num(df.to_numpy(dtype=float)), rowvar=False)
+    i, j = np.triu_indices(df.shape[1], k=1)
+    vals = r[i, j]
+    order = np.argsort(-np.abs(np.nan_to_num(vals)))[:top]
+    cols = list(df.columns)
+    return [{"a": cols[i[o]], "b": cols[j[o]], "r": round(float(vals[o]), 3)} for o in order if not np.isnan(vals[o])]
+
+
+# =========================================================
+# CONTEXT PACKING (query-aware, token budget)
+# =========================================================
+DIGEST_SOURCE_TOKENS = 900
+PLAN_TREND_TOKENS = 600  # Plan Builder에 넘기는 트렌드 해석 텍스트 예산
+TOKENIZER_ENCODING = "o200k_base"
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。…])\s+|\n+")
+_TERM = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+@singleton
+def _tokenizer() -> Any:
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        # 인코딩 파일을 내려받지 못하는 환경(오프라인 등)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _tokenizer()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    # 근사치: 한글은 대략 1자 ≈ 1토큰, 영문은 4자 ≈ 1토큰
+    hangul = len(re.findall(r"[가-힣]", text))
+    return hangul + max(0, len(text) - hangul) // 4 + 1
+
+
+def truncate_tokens(text: str, budget_tokens: int) -> str:
+    # 앞에서부터 budget_tokens 토큰만 남긴다.
+    if budget_tokens <= 0:
+        return ""
+    enc = _tokenizer()
+    if enc is not None:
+        ids = enc.encode(text, disallowed_special=())
+        return text if len(ids) <= budget_tokens else enc.decode(ids[:budget_tokens])
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= budget_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [p.strip() for p in _SENTENCE_SPLIT.split(text or "") if p and p.strip()]
+
+
+def _terms(text: str) -> List[str]:
+    # 한글 어절은 조사/어미가 붙으므로 원형 + 2-gram을 함께 쓴다.
+    out: List[str] = []
+    for tok in _TERM.findall((text or "").lower()):
+        out.append(tok)
+        if "가" <= tok[0] <= "힣" and len(tok) > 2:
+            out.extend(tok[i : i + 2] for i in range(len(tok) - 1))
+    return out
+
+
+@traced("cpu")
+def pack_context(text: str, query: str, budget_tokens: int) -> str:
+    # 문장 단위 BM25(query 기준) + 앞부분 가중치로 점수를 매겨, 토큰 예산 안에서 높은 순으로 고른 뒤
+    # 원래 순서대로 이어 붙인다. 건너뛴 구간은 "…"로 표시.
+    text = (text or "").strip()
+    if count_tokens(text) <= budget_tokens:
+        return text
+    sents = split_sentences(text)
+    if not sents:
+        return ""
+
+    docs = [_terms(x) for x in sents]
+    n = len(docs)
+    avgdl = sum(len(d) for d in docs) / n or 1.0
+    df: Dict[str, int] = {}
+    for d in docs:
+        for t in set(d):
+            df[t] = df.get(t, 0) + 1
+    q_terms = set(_terms(query))
+    k1, b = 1.5, 0.75
+
+    scores = []
+    for i, d in enumerate(docs):
+        tf: Dict[str, int] = {}
+        for t in d:
+            if t in q_terms:
+                tf[t] = tf.get(t, 0) + 1
+        score = 0.0
+        for t, f in tf.items():
+            idf = max(0.0, math.log((n - df[t] + 0.5) / (df[t] + 0.5) + 1.0))
+            score += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(d) / avgdl))
+        # 리드 문장 선호(질의와 무관한 경우 앞에서부터 채우는 것과 같아진다)
+        score += 0.3 * (1.0 - i / n)
+        scores.append(score)
+
+    chosen, used = set(), 0
+    for i in sorted(range(n), key=lambda i: scores[i], reverse=True):
+        cost = count_tokens(sents[i]) + 1
+        if used + cost > budget_tokens:
+            continue
+        chosen.add(i)
+        used += cost
+
+    if not chosen:
+        # 모든 문장이 예산보다 길다(구두점 없이 이어지는 추출 본문) → 가장 점수가 높은 문장의 앞부분
+        best = max(range(n), key=lambda i: scores[i])
+        head = truncate_tokens(sents[best], budget_tokens - 2)
+        return f"{'… ' if best > 0 else ''}{head} …" if head else ""
+
+    # 앞부분(리드 문장 포함)을 건너뛴 경우도 "…"로 표시한다.
+    parts, prev = [], -1
+    for i in sorted(chosen):
+        if i != prev + 1:
+            parts.append("…")
+        parts.append(sents[i])
+        prev = i
+    return " ".join(parts)
+
+
+# =========================================================
+# LLM
+# =========================================================
+LLM_MAX_CONCURRENCY = int(os.getenv("MAJORPASS_LLM_CONCURRENCY", "8"))
+LLM_MAX_QUEUE_S = 30.0
+LLM_CLIENT_RETRIES = 3
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("MAJORPASS_LLM_TIMEOUT_S", "120"))  # 요청 1회(재시도 전) 상한
+LLM_SLOT_TIMEOUT_S = 2 * LLM_REQUEST_TIMEOUT_S  # 동시성 슬롯 대기 상한: 멈춘 호출이 슬롯을 영원히 막지 않게
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    # "1s", "6m0s", "20ms", "1h2m3.5s" -> seconds
+    if not value:
+        return None
+    total = 0.0
+    for num, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(num) * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}[unit]
+    return total
+
+
+class _RateBucket:
+    __slots__ = ("limit_requests", "remaining_requests", "reset_requests_at", "limit_tokens", "remaining_tokens", "reset_tokens_at")
+
+    def __init__(self) -> None:
+        self.limit_requests: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.reset_requests_at = 0.0
+        self.limit_tokens: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.reset_tokens_at = 0.0
+
+    def refill(self, now: float) -> None:
+        if self.remaining_requests is not None and now >= self.reset_requests_at:
+            self.remaining_requests = self.limit_requests
+        if self.remaining_tokens is not None and now >= self.reset_tokens_at:
+            self.remaining_tokens = self.limit_tokens
+
+
+class _GatedStream:
+    # 스트리밍 응답이 끝나거나 닫힐 때까지 동시성 슬롯을 잡고 있는다.
+    def __init__(self, stream: Any, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._closed = False
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class LLMGateway:
+    # 프로세스 전체가 공유하는 OpenAI 진입점.
+    # - API 키당 OpenAI 클라이언트(=HTTP 풀) 1개
+    # - 동시 요청 수 상한(LLM_MAX_CONCURRENCY)
+    # - x-ratelimit-* 헤더로 추적한 요청/토큰 버킷이 비면 리셋 시각까지 잠깐 대기(최대 LLM_MAX_QUEUE_S)
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._cond = threading.Condition()
+        self._clients: Dict[str, "OpenAI"] = {}
+        self._buckets: Dict[str, _RateBucket] = {}
+
+    def client(self, api_key: str) -> "OpenAI":
+        client = self._clients.get(api_key)
+        if client is not None:
+            return client
+        try:
+            from openai import OpenAI  # 첫 import(~1s)는 게이트웨이 락 밖에서
+        except ImportError as e:
+            # find_spec은 통과했지만 실제 import가 깨진 경우(하위 의존성 누락 등): 이후 LLM 기능을 끈다.
+            global OPENAI_AVAILABLE
+            OPENAI_AVAILABLE = False
+            raise RuntimeError(f"openai 패키지를 불러오지 못했습니다: {e}") from e
+
+        with self._cond:
+            if api_key not in self._clients:
+                self._clients[api_key] = OpenAI(api_key=api_key, max_retries=LLM_CLIENT_RETRIES, timeout=LLM_REQUEST_TIMEOUT_S)
+                self._buckets[api_key] = _RateBucket()
+            return self._clients[api_key]
+
+    def chat(self, api_key: str, **kwargs: Any) -> Any:
+        with span("openai_chat", "network", stream=bool(kwargs.get("stream"))) as sp:
+            return self._chat(api_key, sp, kwargs)
+
+    def _chat(self, api_key: str, sp: Dict[str, Any], kwargs: Dict[str, Any]) -> Any:
+        # 스트리밍이면 span은 응답 헤더를 받을 때까지(첫 토큰 전)만 잰다. 나머지는 llm_stream span.
+        client = self.client(api_key)
+        queued = time.perf_counter()
+        self._reserve(api_key, self._estimate_tokens(kwargs))
+        if not self._slots.acquire(timeout=LLM_SLOT_TIMEOUT_S):
+            sp["queue_ms"] = round((time.perf_counter() - queued) * 1000, 1)
+            raise TimeoutError(f"LLM 요청 대기 시간 초과: {LLM_SLOT_TIMEOUT_S:.0f}초 동안 빈 동시성 슬롯이 없습니다")
+        sp["queue_ms"] = round((time.perf_counter() - queued) * 1000, 1)
+        release = self._slots.release
+        try:
+            raw = client.chat.completions.with_raw_response.create(**kwargs)
+            self._record(api_key, raw.headers)
+            parsed = raw.parse()
+        except Exception as e:
+            headers = getattr(getattr(e, "response", None), "headers", None)
+            if headers is not None:
+                self._record(api_key, headers)
+            release()
+            raise
+        if kwargs.get("stream"):
+            return _GatedStream(parsed, release)
+        release()
+        return parsed
+
+    @staticmethod
+    def _estimate_tokens(kwargs: Dict[str, Any]) -> int:
+        chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+        return chars // 2 + int(kwargs.get("max_tokens") or 800)
+
+    def _reserve(self, api_key: str, tokens: int) -> None:
+        deadline = time.monotonic() + LLM_MAX_QUEUE_S
+        with self._cond:
+            bucket = self._buckets[api_key]
+            while True:
+                now = time.monotonic()
+                bucket.refill(now)
+                req_ok = bucket.remaining_requests is None or bucket.remaining_requests > 0
+                tok_ok = bucket.remaining_tokens is None or bucket.remaining_tokens >= tokens
+                if (req_ok and tok_ok) or now >= deadline:
+                    # 기한을 넘기면 그대로 보낸다(429는 클라이언트 재시도가 처리).
+                    break
+                wake = min(t for t, ok in ((bucket.reset_requests_at, req_ok), (bucket.reset_tokens_at, tok_ok)) if not ok)
+                self._cond.wait(timeout=max(0.05, min(wake, deadline) - now))
+            if bucket.remaining_requests is not None:
+                bucket.remaining_requests -= 1
+            if bucket.remaining_tokens is not None:
+                bucket.remaining_tokens -= tokens
+
+    def _record(self, api_key: str, headers: Any) -> None:
+        def _int(name: str) -> Optional[int]:
+            try:
+                return int(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        now = time.monotonic()
+        with self._cond:
+            bucket = self._buckets[api_key]
+            limit, remaining, reset = _int("x-ratelimit-limit-requests"), _int("x-ratelimit-remaining-requests"), _parse_reset(headers.get("x-ratelimit-reset-requests"))
+            if remaining is not None:
+                bucket.limit_requests = limit if limit is not None else bucket.limit_requests
+                bucket.remaining_requests = remaining
+                bucket.reset_requests_at = now + (reset or 1.0)
+            limit, remaining, reset = _int("x-ratelimit-limit-tokens"), _int("x-ratelimit-remaining-tokens"), _parse_reset(headers.get("x-ratelimit-reset-tokens"))
+            if remaining is not None:
+                bucket.limit_tokens = limit if limit is not None else bucket.limit_tokens
+                bucket.remaining_tokens = remaining
+                bucket.reset_tokens_at = now + (reset or 1.0)
+            self._cond.notify_all()
+
+
+@singleton
+def llm_gateway() -> LLMGateway:
+    return LLMGateway()
+
+
+def openai_client(openai_key: str) -> "OpenAI":
+    return llm_gateway().client(openai_key)
+
+
+LLM_CACHE_TTL_S = 6 * 60 * 60
+LLM_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class LLMCache:
+    # (model, system, temperature, payload 해시) -> 응답 텍스트. TTL + 총 바이트 기준 LRU.
+    # 같은 키로 동시에 들어온 호출은 첫 호출의 결과(Future)를 함께 기다린다(single-flight).
+    def __init__(self, ttl_s: float = LLM_CACHE_TTL_S, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, Future] = {}
+
+    @staticmethod
+    def key(model: str, system: str, temperature: float, payload: Any) -> str:
+        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+        raw = json.dumps([model, system, round(float(temperature), 3), hashlib.sha256(canonical.encode("utf-8")).hexdigest()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._pop_locked(key)
+            self._items[key] = (time.monotonic() + self.ttl_s, value)
+            self._bytes += len(value.encode("utf-8"))
+            while self._bytes > self.max_bytes and self._items:
+                self._pop_locked(next(iter(self._items)))
+
+    def get_or_compute(self, key: str, compute: Callable[[], str], validate: Optional[Callable[[str], bool]] = None) -> str:
+        # 빈 응답이나 validate를 통과하지 못한 응답(거절문, 깨진 JSON)은 돌려주기만 하고 저장하지 않는다.
+        # 그래야 같은 입력으로 다시 눌렀을 때 새로 호출된다.
+        with self._lock:
+            hit = self._get_locked(key)
+            if hit is not None:
+                return hit
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+        if not owner:
+            return fut.result()
+        try:
+            value = compute()
+            if self.cacheable(value, validate):
+                self.put(key, value)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    @staticmethod
+    def cacheable(value: str, validate: Optional[Callable[[str], bool]] = None) -> bool:
+        return bool(value and value.strip()) and (validate is None or validate(value))
+
+    def _get_locked(self, key: str) -> Optional[str]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            self._pop_locked(key)
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def _pop_locked(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1].encode("utf-8"))
+
+
+@singleton
+def llm_cache() -> LLMCache:
+    return LLMCache()
+
+
+# 구조화 출력: 모델이 받아 주는 가장 엄격한 형식부터 쓴다. json_schema(strict) → json_object(JSON 모드) → 없음.
+# 거절(400)된 형식은 LLM_FORMAT_REJECT_TTL_S 동안 기억해 바로 건너뛴다. "지원하지 않음"이면 모델 전체,
+# 그 밖의 거절(스키마 오류 등)은 그 스키마에만 적용한다. MAJORPASS_LLM_RESPONSE_FORMAT으로 상한을 낮출 수 있다.
+LLM_RESPONSE_FORMATS = ("json_schema", "json_object", "off")
+LLM_RESPONSE_FORMAT = os.getenv("MAJORPASS_LLM_RESPONSE_FORMAT", "json_schema")
+LLM_FORMAT_REJECT_TTL_S = 3600.0
+_rejected_formats: Dict[Tuple[str, str, str], float] = {}  # (model, 형식, 스키마 해시 또는 "") → 만료 시각
+
+
+def _schema_scope(schema: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _format_rejected(model: str, kind: str, scope: str) -> bool:
+    now = time.time()
+    for key in ((model, kind, ""), (model, kind, scope)):
+        expires = _rejected_formats.get(key)
+        if expires is None:
+            continue
+        if expires > now:
+            return True
+        _rejected_formats.pop(key, None)
+    return False
+
+
+def _reject_format(model: str, kind: str, scope: str, error: Exception) -> None:
+    model_wide = "not supported" in str(error).lower()
+    _rejected_formats[(model, kind, "" if model_wide else scope)] = time.time() + LLM_FORMAT_REJECT_TTL_S
+
+
+def json_schema(example: Any) -> Dict[str, Any]:
+    # output_schema 예시({"k": "string", "n": 1, "p": "High|Low", "xs": ["string"]}) → strict JSON Schema
+    if isinstance(example, dict):
+        return {
+            "type": "object",
+            "properties": {k: json_schema(v) for k, v in example.items()},
+            "required": list(example),
+            "additionalProperties": False,
+        }
+    if isinstance(example, list):
+        return {"type": "array", "items": json_schema(example[0] if example else "string")}
+    if isinstance(example, bool):
+        return {"type": "boolean"}
+    if isinstance(example, int):
+        return {"type": "integer"}
+    if isinstance(example, float):
+        return {"type": "number"}
+    if isinstance(example, str) and "|" in example:
+        return {"type": "string", "enum": example.split("|")}
+    return {"type": "string"}
+
+
+def _response_formats(model: str, schema: Optional[Dict[str, Any]], scope: str = "") -> List[Optional[Dict[str, Any]]]:
+    if schema is None:
+        return [None]
+    start = LLM_RESPONSE_FORMATS.index(LLM_RESPONSE_FORMAT) if LLM_RESPONSE_FORMAT in LLM_RESPONSE_FORMATS else 0
+    out: List[Optional[Dict[str, Any]]] = []
+    for kind in LLM_RESPONSE_FORMATS[start:]:
+        if kind == "off":
+            out.append(None)
+        elif not _format_rejected(model, kind, scope or _schema_scope(schema)):
+            if kind == "json_schema":
+                out.append({"type": "json_schema", "json_schema": {"name": "output", "strict": True, "schema": json_schema(schema)}})
+            else:
+                out.append({"type": "json_object"})
+    return out
+
+
+def _with_response_format(model: str, schema: Optional[Dict[str, Any]], call: Callable[[Dict[str, Any]], Any]) -> Any:
+    scope = _schema_scope(schema) if schema is not None else ""
+    for fmt in _response_formats(model, schema, scope):
+        try:
+            return call({"response_format": fmt} if fmt else {})
+        except Exception as e:
+            # 형식 자체를 거절한 400만 다음 형식으로 넘어간다. 그 밖의 오류는 그대로 올린다.
+            if fmt is None or getattr(e, "status_code", None) != 400 or "response_format" not in str(e):
+                raise
+            _reject_format(model, fmt["type"], scope, e)
+    raise RuntimeError("unreachable")
+
+
+def llm_complete(
+    openai_key: str,
+    model: str,
+    system: str,
+    payload: Dict[str, Any],
+    temperature: float,
+    cache_key: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    with span("llm_complete", "llm", hit=True) as sp:
+
+        def _call() -> str:
+            sp["hit"] = False
+            messages = [{"role": "system", "content": system}, {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}]
+            resp = _with_response_format(
+                model,
+                schema,
+                lambda fmt: llm_gateway().chat(openai_key, model=model, messages=messages, temperature=temperature, **fmt),
+            )
+            return resp.choices[0].message.content or ""
+
+        return llm_cache().get_or_compute(cache_key or LLMCache.key(model, system, temperature, payload), _call, validate)
+
+
+def llm_stream(
+    openai_key: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    on_done: Optional[Callable[[str], None]] = None,
+    schema: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    # 토큰 델타를 도착하는 대로 yield. 소비 측이 중간에 멈추면(rerun 등) close()로 연결을 끊어
+    # 더 이상 토큰이 생성/과금되지 않게 한다. 끝까지 받은 경우에만 on_done(전체 텍스트) 호출.
+    # span에는 첫 토큰까지 걸린 시간(ttft_ms)도 남긴다. 소비 측이 렌더하느라 멈춘 시간도 포함된다.
+    with span("llm_stream", "llm") as sp:
+        started = time.perf_counter()
+        stream = _with_response_format(
+            model,
+            schema,
+            lambda fmt: llm_gateway().chat(openai_key, model=model, messages=messages, temperature=temperature, stream=True, **fmt),
+        )
+        parts: List[str] = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        sp["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    parts.append(delta)
+                    yield delta
+            if on_done:
+                on_done("".join(parts))
+        finally:
+            stream.close()
+
+
+def try_parse_json(s: str) -> Optional[dict]:
+    # 1) 그대로 2) 첫 '{'부터 괄호 균형이 맞는 구간 3) 잘린 응답이면 마지막 완결된 값까지 자르고 괄호를 닫아 본다.
+    if not s:
+        return None
+    s = s.strip()
+    try:
+        parsed = json.loads(s)
+        return parsed if isinstance(parsed, dict) else None
+    except ValueError:
+        pass
+    start = s.find("{")
+    if start < 0:
+        return None
+    for candidate in _balanced_candidates(s[start:]):
+        for text in (candidate, re.sub(r",\s*([}\]])", r"\1", candidate)):
+            try:
+                parsed = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+    return None
+
+
+def _balanced_candidates(s: str, max_cuts: int = 50) -> Iterator[str]:
+    stack: List[str] = []
+    in_str = escape = False
+    cuts: List[Tuple[int, str]] = []  # (쉼표 위치, 그 시점의 닫는 괄호들)
+    for i, c in enumerate(s):
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if not stack or stack.pop() != c:
+                break
+            if not stack:
+                yield s[: i + 1]
+                return
+        elif c == ",":
+            cuts.append((i, "".join(reversed(stack))))
+    # 여기까지 왔으면 잘린 문서: 열린 문자열/괄호를 닫거나, 뒤에서부터 쉼표 단위로 잘라 닫는다.
+    yield s + ('"' if in_str else "") + "".join(reversed(stack))
+    for i, closers in reversed(cuts[-max_cuts:]):
+        yield s[:i] + closers
+
+
+def is_json_object(text: str) -> bool:
+    return try_parse_json(text) is not None
+
+
+def _cache_put_if(key: str, validate: Optional[Callable[[str], bool]] = None) -> Callable[[str], None]:
+    # llm_stream의 on_done용: 끝까지 받은 응답도 검증을 통과해야 캐시에 남긴다.
+    def put(text: str) -> None:
+        if LLMCache.cacheable(text, validate):
+            llm_cache().put(key, text)
+
+    return put
+
+
+def missing_fields(parsed: Dict[str, Any], schema: Dict[str, Any]) -> List[str]:
+    # 최상위 필드만 본다: 없거나 null이거나 타입(list/dict)이 다른 필드
+    missing = []
+    for k, example in schema.items():
+        v = parsed.get(k)
+        if v is None or (isinstance(example, list) and not isinstance(v, list)) or (isinstance(example, dict) and not isinstance(v, dict)):
+            missing.append(k)
+    return missing
+
+
+@traced("llm")
+def llm_repair_fields(
+    openai_key: str, model: str, payload: Dict[str, Any], parsed: Dict[str, Any], missing: List[str], temperature: float
+) -> Dict[str, Any]:
+    # 전체를 다시 만들지 않고 빠진 필드만 요청한다(출력 토큰이 작다).
+    system = (
+        "너는 JSON 보정기다. context(원래 입력)와 partial(이미 만든 결과)을 참고해 "
+        "output_schema에 있는 필드만 채워라. 다른 필드는 출력하지 마라. 결과는 한국어. 반드시 JSON만 출력."
+    )
+    sub_schema = {k: payload["output_schema"][k] for k in missing}
+    repair_payload = {
+        "context": {k: v for k, v in payload.items() if k != "output_schema"},
+        "partial": {k: v for k, v in parsed.items() if k not in missing},
+        "output_schema": sub_schema,
+    }
+    text = llm_complete(openai_key, model, system, repair_payload, temperature, schema=sub_schema, validate=is_json_object)
+    fixed = try_parse_json(text) or {}
+    return {k: fixed[k] for k in missing if fixed.get(k) is not None}
+
+
+def llm_structured(
+    openai_key: str,
+    model: str,
+    system: str,
+    payload: Dict[str, Any],
+    temperature: float,
+    cache_key: Optional[str] = None,
+    unwrap: Optional[str] = None,
+) -> Dict[str, Any]:
+    # payload["output_schema"]를 강제(가능하면 json_schema)하고, 빠진 필드는 작은 보정 호출로 채운다.
+    # 보정된 결과는 같은 캐시 키에 덮어써 다음 적중 때 다시 보정하지 않는다.
+    # unwrap: 응답이 {unwrap: {...}}로 감싸여 오면 안쪽 객체를 결과로 본다(스키마에 없는 키일 때만).
+    schema = payload["output_schema"]
+    key = cache_key or LLMCache.key(model, system, temperature, payload)
+    text = llm_complete(openai_key, model, system, payload, temperature, cache_key=key, schema=schema, validate=is_json_object)
+    parsed = try_parse_json(text)
+    if unwrap and unwrap not in schema and parsed and isinstance(parsed.get(unwrap), dict):
+        parsed = parsed[unwrap]
+    return _complete_fields(openai_key, model, payload, parsed, temperature, key)
+
+
+def _complete_fields(
+    openai_key: str, model: str, payload: Dict[str, Any], parsed: Optional[dict], temperature: float, key: str
+) -> Dict[str, Any]:
+    if not parsed:
+        raise ValueError("JSON 파싱 실패")
+    missing = missing_fields(parsed, payload["output_schema"])
+    if missing:
+        parsed.update(llm_repair_fields(openai_key, model, payload, parsed, missing, temperature))
+        llm_cache().put(key, json.dumps(parsed, ensure_ascii=False))
+    return parsed
+
+
+class JsonItemStream:
+    # 스트리밍으로 오는 JSON 문서에서 최상위 객체의 `key` 배열 원소(객체)가 닫히는 대로 꺼낸다.
+    # 문자열/이스케이프 상태와 괄호 깊이만 추적하므로 델타가 어디서 잘려도 된다. 첫 '{' 앞의 잡문은 무시.
+    def __init__(self, key: str):
+        self.key = key
+        self.document: Optional[dict] = None  # 최상위 객체가 닫히면 전체 파싱 결과
+        self.emitted: List[int] = []  # 꺼낸 원소의 배열 내 위치(파싱에 실패한 원소는 건너뛴다)
+        self._index = 0
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []  # "{", "[", 대상 배열은 "T"
+        self._in_str = False
+        self._escape = False
+        self._str_start = 0
+        self._last_key = ""
+        self._root_start = -1
+        self._item_start = -1
+
+    def feed(self, delta: str) -> List[Any]:
+        items = []
+        self._text += delta
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_str = False
+                    if len(self._stack) == 1:
+                        self._last_key = text[self._str_start + 1 : i]
+                continue
+            if self.document is not None or (not self._stack and c != "{"):
+                continue
+            if c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c == "{":
+                if not self._stack:
+                    self._root_start = i
+                elif self._stack == ["{", "T"]:
+                    self._item_start = i
+                self._stack.append("{")
+            elif c == "[":
+                self._stack.append("T" if self._stack == ["{"] and self._last_key == self.key else "[")
+            elif c in "}]":
+                self._stack.pop()
+                if c == "}" and self._stack == ["{", "T"] and self._item_start >= 0:
+                    try:
+                        items.append(json.loads(text[self._item_start : i + 1]))
+                        self.emitted.append(self._index)
+                    except ValueError:
+                        pass
+                    self._index += 1
+                    self._item_start = -1
+                elif not self._stack:
+                    try:
+                        self.document = json.loads(text[self._root_start : i + 1])
+                    except ValueError:
+                        self.document = None
+        self._pos = len(text)
+        return items
+
+
+@traced("llm")
+def llm_profile_analysis(profile: Dict[str, Any], openai_key: str, model: str) -> Dict[str, Any]:
+    system = (
+        "너는 'MajorPass · YONSEI Edition'의 커리어/학업 코치다. "
+        "대상은 대학교 학생. 결과는 한국어로 작성하라. "
+        "실행 가능한 액션과 산출물을 중심으로 제안하라. "
+        "반드시 JSON만 출력(마크다운 금지)."
+    )
+    schema = {
+        "summary_ko": "string",
+        "strengths": ["string"],
+        "risks": ["string"],
+        "next_focus": ["string"],
+        "keyword_suggestions": ["string"],
+        "action_plan": [
+            {"priority": "High|Medium|Low", "action": "string", "deliverable": "string", "weeks": 1, "why": "string"}
+        ],
+    }
+    payload = {"profile": profile, "output_schema": schema}
+    return llm_structured(openai_key, model, system, payload, 0.5)
+
+
+DIGEST_ENTRY_SCHEMA = {
+    "title": "string",
+    "source_url": "string",
+    "one_liner": "string",
+    "highlights": ["string"],
+    "yonsei_takeaways": ["string"],
+    "next_actions": ["string"],
+    "keywords": ["string"],
+    "confidence": "높음|중간|낮음",
+}
+DIGEST_OVERALL_SCHEMA = {"themes": ["string"], "recommended_queries": ["string"], "what_to_do_next": ["string"]}
+DIGEST_MAP_WORKERS = 6
+
+
+def _compact_source(s: Dict[str, Any], query: str = "", budget_tokens: int = DIGEST_SOURCE_TOKENS) -> Dict[str, Any]:
+    return {
+        "title": s.get("Title", ""),
+        "url": s.get("Link", ""),
+        "published": s.get("Published", ""),
+        "type": s.get("Type", ""),
+        "snippet": (s.get("Snippet", "") or "")[:400],
+        "text": pack_context(s.get("ExtractedText", "") or "", f"{query} {s.get('Title', '')}", budget_tokens),
+    }
+
+
+def _digest_request(selected_sources: List[Dict[str, Any]], query: str) -> Tuple[str, Dict[str, Any]]:
+    system = (
+        "너는 'Evidence Digest' 작성자다. 여러 문서 텍스트를 읽고 "
+        "사용자에게 링크 나열이 아니라 정리본만 제공한다. "
+        "결과는 한국어로, 근거가 약하면 confidence를 낮춰라. "
+        "digests를 먼저, overall을 마지막에 쓴다. "
+        "반드시 JSON만 출력(마크다운 금지)."
+    )
+    schema = {"digests": [DIGEST_ENTRY_SCHEMA], "overall": DIGEST_OVERALL_SCHEMA}
+    payload = {"sources": [_compact_source(s, query) for s in selected_sources], "output_schema": schema}
+    return system, payload
+
+
+@traced("llm")
+def llm_digest(
+    selected_sources: List[Dict[str, Any]],
+    openai_key: str,
+    model: str,
+    query: str = "",
+    on_entry: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    # on_entry가 있으면 스트리밍으로 받아 digests[] 항목이 닫히는 대로 넘긴다(overall은 반환값으로 마지막에).
+    system, payload = _digest_request(selected_sources, query)
+    if on_entry is None:
+        return llm_structured(openai_key, model, system, payload, 0.4)
+    return _stream_digest(openai_key, model, system, payload, on_entry)
+
+
+def _stream_digest(
+    openai_key: str, model: str, system: str, payload: Dict[str, Any], on_entry: Callable[[Dict[str, Any]], None]
+) -> Dict[str, Any]:
+    key = LLMCache.key(model, system, 0.4, payload)  # llm_complete와 같은 키 → 두 경로가 캐시를 공유
+    text = llm_cache().get(key)
+    sent: Set[int] = set()  # 이미 넘긴 digests 위치
+    if text is None:
+        parser = JsonItemStream("digests")
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}]
+        parts: List[str] = []
+        stream = llm_stream(
+            openai_key, model, messages, 0.4, on_done=_cache_put_if(key, is_json_object), schema=payload["output_schema"]
+        )
+        for delta in stream:
+            parts.append(delta)
+            for entry in parser.feed(delta):
+                on_entry(entry)
+        sent.update(parser.emitted)
+        text = "".join(parts)
+        parsed = parser.document or try_parse_json(text)
+    else:
+        parsed = try_parse_json(text)
+    parsed = _complete_fields(openai_key, model, payload, parsed, 0.4, key)
+    # 캐시 적중이거나 스트림 파서가 놓친(보정으로 채운) 항목은 위치로 골라 여기서 넘긴다.
+    for i, entry in enumerate(parsed.get("digests") or []):
+        if i not in sent:
+            on_entry(entry)
+    return parsed
+
+
+@traced("llm")
+def llm_digest_source(source: Dict[str, Any], openai_key: str, model: str, query: str = "") -> Dict[str, Any]:
+    system = (
+        "너는 'Evidence Digest' 작성자다. 문서 하나를 읽고 digests 항목 하나를 만든다. "
+        "결과는 한국어로, 근거가 약하면 confidence를 낮춰라. "
+        "반드시 JSON 객체 하나만 출력(마크다운 금지)."
+    )
+    compact = _compact_source(source, query)
+    payload = {"source": compact, "output_schema": DIGEST_ENTRY_SCHEMA}
+    # 캐시 키는 URL + 본문 해시: 선택이 바뀌어도 그대로인 소스는 다시 요약하지 않는다.
+    content_hash = hashlib.sha256(compact["text"].encode("utf-8")).hexdigest()
+    key = LLMCache.key(model, system, 0.3, {"url": compact["url"], "content_sha256": content_hash})
+    parsed = llm_structured(openai_key, model, system, payload, 0.3, cache_key=key)
+    parsed.setdefault("source_url", compact["url"])
+    return parsed
+
+
+@traced("llm")
+def llm_digest_reduce(digests: List[Dict[str, Any]], openai_key: str, model: str) -> Dict[str, Any]:
+    system = (
+        "너는 'Evidence Digest' 편집자다. 문서별 요약을 종합해 overall만 작성한다. "
+        "결과는 한국어. 반드시 JSON만 출력(마크다운 금지)."
+    )
+    brief = [
+        {k: d.get(k) for k in ("title", "one_liner", "highlights", "keywords", "next_actions", "confidence")}
+        for d in digests
+    ]
+    # 모델이 {"overall": {...}}로 감싸 답하는 경우가 있어 필드 검사(보정) 전에 벗긴다.
+    payload = {"digests": brief, "output_schema": DIGEST_OVERALL_SCHEMA}
+    return llm_structured(openai_key, model, system, payload, 0.4, unwrap="overall")
+
+
+@traced("llm")
+def llm_digest_map_reduce(
+    selected_sources: List[Dict[str, Any]],
+    openai_key: str,
+    model: str,
+    query: str = "",
+    on_entry: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_skip: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    # map: 소스별 digests 항목을 병렬 생성(소스 단위 캐시) → reduce: 작은 호출로 overall 생성
+    # on_entry: 항목이 끝나는 대로(완료 순서) 호출. 반환값의 digests는 소스 순서를 유지한다.
+    # 요약에 실패한 소스는 빠지는 대신 skipped(title/url/error)로 돌려주고, 실패하는 대로 on_skip도 호출한다.
+    if not selected_sources:
+        raise ValueError("선택된 소스가 없습니다")
+    done: Dict[int, Dict[str, Any]] = {}
+    failed: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, Exception] = {}
+    with ThreadPoolExecutor(max_workers=min(DIGEST_MAP_WORKERS, len(selected_sources)), thread_name_prefix="digest-map") as pool:
+        futures = {pool.submit(llm_digest_source, s, openai_key, model, query): i for i, s in enumerate(selected_sources)}
+        for f in as_completed(futures):
+            i = futures[f]
+            try:
+                done[i] = f.result()
+            except Exception as e:
+                errors[i] = e
+                failed[i] = {
+                    "title": selected_sources[i].get("Title", ""),
+                    "url": selected_sources[i].get("Link", ""),
+                    "error": f"{type(e).__name__}: {e}",
+                }
+                if on_skip:
+                    on_skip(failed[i])
+                continue
+            if on_entry:
+                on_entry(done[i])
+    if not done:
+        raise errors[min(errors)]
+    digests = [done[i] for i in sorted(done)]
+    skipped = [failed[i] for i in sorted(failed)]
+    return {"digests": digests, "overall": llm_digest_reduce(digests, openai_key, model), "skipped": skipped}
+
+
+def compact_digest(digest: Any) -> Any:
+    # 다른 빌더에 넘길 때는 카드별 핵심 필드만 남긴다.
+    if not isinstance(digest, dict):
+        return digest
+    return {
+        "overall": digest.get("overall"),
+        "digests": [
+            {k: d.get(k) for k in ("title", "one_liner", "highlights", "next_actions")}
+            for d in digest.get("digests", [])
+            if isinstance(d, dict)
+        ],
+    }
+
+
+def _trend_request(df: pd.DataFrame, time_unit: str) -> Tuple[str, Dict[str, Any]]:
+    # 원시 행 대신 전체 구간에서 계산한 요약 신호만 보낸다.
+    features = trend_features(df, time_unit)
+    system = (
+        "너는 'Trend Pulse' 분석가다. 키워드별 시계열 요약 신호(기울기, 변화율, 이상치, 피크, 상관, 계절성)를 보고 "
+        "패턴을 찾아 다음 행동(수업/프로젝트/검색어/포트폴리오)으로 연결하라. "
+        "결과는 한국어로, 짧고 구조적으로."
+    )
+    payload = {
+        "time_unit": time_unit,
+        "range": [str(df.index[0]), str(df.index[-1])],
+        "n_periods": int(len(df)),
+        "features": json.loads(features.reset_index().to_json(orient="records", force_ascii=False)),
+        "top_correlations": trend_correlations(df),
+        "recent": json.loads(df.tail(3).round(1).to_json(orient="index", force_ascii=False)),
+    }
+    return system, payload
+
+
+@traced("llm")
+def llm_trend_interpretation(df: pd.DataFrame, openai_key: str, model: str, time_unit: str = "week") -> str:
+    system, payload = _trend_request(df, time_unit)
+    return llm_complete(openai_key, model, system, payload, 0.4)
+
+
+def llm_trend_interpretation_stream(df: pd.DataFrame, openai_key: str, model: str, time_unit: str = "week") -> Iterator[str]:
+    system, payload = _trend_request(df, time_unit)
+    key = LLMCache.key(model, system, 0.4, payload)
+    cached = llm_cache().get(key)
+    if cached is not None:
+        yield cached
+        return
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}]
+    yield from llm_stream(openai_key, model, messages, 0.4, on_done=_cache_put_if(key))
+
+
+@traced("llm")
+def llm_plan_builder(context: Dict[str, Any], openai_key: str, model: str) -> Dict[str, Any]:
+    system = (
+        "너는 'Plan Builder'다. 프로필/요약/트렌드/분석을 종합해 다음 학기 실행 로드맵을 만든다. "
+        "주차별, 산출물 중심. 결과는 한국어. 반드시 JSON만 출력."
+    )
+    schema = {
+        "goal": "string",
+        "north_star_deliverables": ["string"],
+        "weekly_plan": [{"week": 1, "focus": "string", "deliverable": "string", "tasks": ["string"]}],
+        "risk_controls": ["string"],
+        "checklist": ["string"],
+    }
+    profile = context.get("profile") or {}
+    trend_summary = context.get("trend_summary")
+    if isinstance(trend_summary, str):
+        # 트렌드 해석은 긴 자유 텍스트 → 관심 분야/전공 기준으로 관련 문장만 예산 안에서 남긴다.
+        trend_summary = pack_context(trend_summary, f"{profile.get('interest', '')} {profile.get('major', '')}", PLAN_TREND_TOKENS)
+    compact = {**context, "digest": compact_digest(context.get("digest")), "trend_summary": trend_summary}
+    payload = {"context": compact, "output_schema": schema}
+    return llm_structured(openai_key, model, system, payload, 0.45)
+
+
+CHAT_SYSTEM = (
+    "너는 'MajorPass · YONSEI Edition'의 대화 코치다. "
+    "항상 한국어로 답하라. 구조적으로(짧은 소제목/불릿) 쓰고 "
+    "마지막에 '다음 행동' 체크리스트로 마무리하라."
+)
+CHAT_KEEP_RECENT = 6  # 요약으로 접지 않고 원문으로 보내는 최근 메시지 수
+CHAT_FOLD_BATCH = 4  # 이만큼 쌓이면 한 번에 요약으로 접는다
+CHAT_MAX_UNFOLDED = 12  # 요약이 늦거나 실패해도 원문으로 보내는 메시지는 최근 이만큼까지
+
+
+def chat_context_blob(context: Dict[str, Any]) -> str:
+    # 키 정렬 + 고정 구분자: 같은 컨텍스트면 항상 같은 바이트열(프롬프트 캐시 접두부).
+    ctx = {
+        "profile": context.get("profile"),
+        "analysis": context.get("analysis"),
+        "digest_overall": (context.get("digest") or {}).get("overall") if isinstance(context.get("digest"), dict) else context.get("digest"),
+        "trend_summary": context.get("trend"),
+        "plan": context.get("plan"),
+    }
+    return json.dumps(ctx, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _chat_messages(history: List[Dict[str, Any]], context_blob: str, user_message: str, memory: str = "") -> List[Dict[str, str]]:
+    # 순서: [system + 컨텍스트] (바뀔 때만 변함) → [대화 요약] → [접히지 않은 최근 대화] → [이번 질문]
+    messages = [{"role": "system", "content": f"{CHAT_SYSTEM}\n\n컨텍스트(JSON): {context_blob}"}]
+    if memory:
+        messages.append({"role": "system", "content": f"이전 대화 요약: {memory}"})
+    recent = [m for m in history if not m.get("folded")][-CHAT_MAX_UNFOLDED:]
+    messages.extend({"role": m["role"], "content": m["content"]} for m in recent)
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+@traced("llm")
+def llm_chat(*, openai_key: str, model: str, history: List[Dict[str, Any]], context_blob: str, user_message: str, memory: str = "") -> str:
+    messages = _chat_messages(history, context_blob, user_message, memory)
+    resp = llm_gateway().chat(openai_key, model=model, messages=messages, temperature=0.6)
+    return resp.choices[0].message.content or ""
+
+
+def llm_chat_stream(*, openai_key: str, model: str, history: List[Dict[str, Any]], context_blob: str, user_message: str, memory: str = "") -> Iterator[str]:
+    return llm_stream(openai_key, model, _chat_messages(history, context_blob, user_message, memory), 0.6)
+
+
+@traced("llm")
+def llm_fold_memory(openai_key: str, model: str, memory: str, messages: List[Dict[str, Any]]) -> str:
+    system = (
+        "너는 대화 메모리 관리자다. 기존 요약에 새 대화를 반영해 갱신된 요약만 한국어로 출력하라. "
+        "사용자의 목표/결정/선호/약속한 다음 행동을 보존하고 10줄 이내로."
+    )
+    payload = {"summary": memory, "new_messages": [{"role": m["role"], "content": m["content"]} for m in messages]}
+    return llm_complete(openai_key, model, system, payload, 0.2).strip()
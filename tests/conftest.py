@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# engine은 import 시점에 캐시 경로/백엔드를 읽으므로 먼저 테스트용으로 돌려놓는다.
+os.environ.setdefault("MAJORPASS_CACHE_DIR", tempfile.mkdtemp(prefix="majorpass-test-"))
+os.environ.setdefault("MAJORPASS_CACHE_BACKEND", "memory")
+os.environ.setdefault("MAJORPASS_TRACE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+
+import pytest
+
+import engine
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_fold_finished_during_a_chat_turn_is_applied_in_that_turn(monkeypatch):
+    # 요약 job이 채팅 턴 도중(답변 스트리밍 중)에 끝나는 상황: 채팅 fragment만 다시 실행되는 턴에서는
+    # 사이드바의 apply_finished_jobs가 돌지 않으므로, 같은 턴 안에서 반영돼야 한다.
+    started, release, returned = threading.Event(), threading.Event(), threading.Event()
+
+    def fold_memory(openai_key, model, memory, messages):
+        started.set()
+        release.wait(5)
+        returned.set()
+        return "요약"
+
+    def chat_stream(**kwargs):
+        if started.is_set() and not returned.is_set():
+            release.set()
+            returned.wait(5)
+            time.sleep(0.1)  # job 상태가 done으로 바뀔 때까지
+        yield "답변"
+
+    monkeypatch.setattr(engine, "llm_enabled", lambda key: True)
+    monkeypatch.setattr(engine, "llm_chat_stream", chat_stream)
+    monkeypatch.setattr(engine, "llm_fold_memory", fold_memory)
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    for i in range(10):
+        at.chat_input[0].set_value(f"질문 {i}").run()
+        if returned.is_set():
+            break
+    assert returned.is_set()
+    assert at.session_state["chat_memory"] == "요약"
+    assert all(j.applied for j in at.session_state["jobs"].values() if j.kind == "fold")
+    assert any(m.get("folded") for m in at.session_state["chat_history"])
@@ -0,0 +1,43 @@
+import json
+
+import batch
+
+
+def write_csv(tmp_path):
+    path = tmp_path / "students.csv"
+    path.write_text(
+        "student_id,major,gpa,major_credit\n"
+        "s1,경영,3.9,40\n"
+        "s2,통계,3.7/4.5,50\n"
+        "s3,컴공,,\n",
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_read_profiles_keeps_good_rows_and_reports_bad_ones(tmp_path):
+    profiles, invalid = batch.read_profiles(write_csv(tmp_path))
+    assert [sid for sid, _ in profiles] == ["s1", "s3"]
+    assert profiles[0][1]["gpa"] == 3.9 and profiles[0][1]["major_credit"] == 40
+    assert profiles[1][1]["gpa"] == batch.PROFILE_DEFAULTS["gpa"]
+    assert len(invalid) == 1
+    assert invalid[0]["student_id"] == "s2" and invalid[0]["status"] == "error"
+    assert "gpa" in invalid[0]["error"] and "3.7/4.5" in invalid[0]["error"]
+
+
+def test_read_profiles_reports_unreadable_jsonl_lines(tmp_path):
+    path = tmp_path / "students.jsonl"
+    path.write_text('{"student_id": "a", "gpa": 4.0}\n{"student_id": "b", \n\n["x"]\n', encoding="utf-8")
+    profiles, invalid = batch.read_profiles(str(path))
+    assert [sid for sid, _ in profiles] == ["a"]
+    assert [rec["student_id"] for rec in invalid] == ["2", "3"]
+
+
+def test_batch_runs_the_other_students_when_one_row_is_bad(tmp_path, monkeypatch):
+    for key in ("OPENAI_API_KEY", "NAVER_CLIENT_ID", "NAVER_CLIENT_SECRET"):
+        monkeypatch.delenv(key, raising=False)
+    out = tmp_path / "results.jsonl"
+    assert batch.main([write_csv(tmp_path), "--out", str(out), "--steps", "profile"]) == 1
+    records = {rec["student_id"]: rec for rec in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    assert {sid: rec["status"] for sid, rec in records.items()} == {"s1": "ok", "s2": "error", "s3": "ok"}
+    assert "3.7/4.5" in records["s2"]["error"]
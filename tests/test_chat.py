@@ -0,0 +1,24 @@
+from engine import CHAT_MAX_UNFOLDED, _chat_messages
+
+
+def turns(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"} for i in range(n)]
+
+
+def test_folded_turns_are_replaced_by_memory():
+    history = turns(8)
+    for m in history[:4]:
+        m["folded"] = True
+    messages = _chat_messages(history, "{}", "q", memory="요약")
+    assert messages[1] == {"role": "system", "content": "이전 대화 요약: 요약"}
+    assert [m["content"] for m in messages[2:]] == ["m4", "m5", "m6", "m7", "q"]
+
+
+def test_unfolded_turns_are_capped_even_with_memory():
+    history = turns(CHAT_MAX_UNFOLDED + 10)
+    for m in history[:2]:
+        m["folded"] = True
+    for memory in ("", "요약"):
+        messages = _chat_messages(history, "{}", "q", memory=memory)
+        sent = [m["content"] for m in messages if m["role"] != "system"][:-1]
+        assert sent == [m["content"] for m in history[-CHAT_MAX_UNFOLDED:]]
@@ -0,0 +1,51 @@
+import pytest
+
+import engine
+
+
+def _sources(n):
+    return [{"Title": f"t{i}", "Link": f"https://example.com/{i}"} for i in range(n)]
+
+
+@pytest.fixture
+def fake_map(monkeypatch):
+    def digest_source(source, openai_key, model, query=""):
+        if source["Title"] == "t1":
+            raise ValueError("JSON 파싱 실패")
+        return {"title": source["Title"], "source_url": source["Link"]}
+
+    monkeypatch.setattr(engine, "llm_digest_source", digest_source)
+    monkeypatch.setattr(engine, "llm_digest_reduce", lambda digests, openai_key, model: {"themes": [d["title"] for d in digests]})
+
+
+def test_map_reduce_keeps_source_order_and_reports_failures(fake_map):
+    seen = []
+    out = engine.llm_digest_map_reduce(_sources(4), "k", "m", on_entry=seen.append)
+    assert [d["title"] for d in out["digests"]] == ["t0", "t2", "t3"]
+    assert out["overall"] == {"themes": ["t0", "t2", "t3"]}
+    assert out["skipped"] == [{"title": "t1", "url": "https://example.com/1", "error": "ValueError: JSON 파싱 실패"}]
+    assert sorted(d["title"] for d in seen) == ["t0", "t2", "t3"]
+
+
+def test_map_reduce_raises_when_every_source_fails(fake_map):
+    with pytest.raises(ValueError):
+        engine.llm_digest_map_reduce([{"Title": "t1", "Link": "u"}], "k", "m")
+
+
+def test_map_reduce_reports_failures_as_they_happen(fake_map):
+    cards, skipped = [], []
+    engine.llm_digest_map_reduce(_sources(3), "k", "m", on_entry=cards.append, on_skip=skipped.append)
+    assert len(cards) == 2
+    assert skipped == [{"title": "t1", "url": "https://example.com/1", "error": "ValueError: JSON 파싱 실패"}]
+
+
+def test_stream_digest_sends_each_position_once(monkeypatch):
+    # 스트림에서 두 번째 카드는 깨져 있어(꼬리 쉼표) 건너뛰고, 보정된 최종 결과에서 채워진다.
+    doc = '{"digests": [{"title": "a"}, {"title": "b",}, {"title": "c"}], "overall": {}}'
+    final = {"digests": [{"title": "a"}, {"title": "b"}, {"title": "c"}], "overall": {}}
+    monkeypatch.setattr(engine, "llm_stream", lambda *a, **k: iter([doc[i : i + 7] for i in range(0, len(doc), 7)]))
+    monkeypatch.setattr(engine, "_complete_fields", lambda *a: final)
+    seen = []
+    out = engine._stream_digest("k", "m", "sys", {"q": "position", "output_schema": {}}, seen.append)
+    assert out is final
+    assert [e["title"] for e in seen] == ["a", "c", "b"]
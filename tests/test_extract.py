@@ -0,0 +1,80 @@
+from concurrent.futures import Future
+
+import engine
+from engine import _decode_html
+
+
+def test_decode_html_prefers_header_charset():
+    body = "<p>한글 기사</p>".encode("cp949")
+    assert _decode_html(body, "text/html; charset=EUC-KR") == "<p>한글 기사</p>"
+
+
+def test_decode_html_uses_meta_charset():
+    body = '<meta charset="euc-kr"><p>연세대</p>'.encode("cp949")
+    assert "연세대" in _decode_html(body, "text/html")
+
+
+def test_decode_html_falls_back_to_utf8_then_cp949():
+    assert _decode_html("<p>전공</p>".encode("utf-8"), "") == "<p>전공</p>"
+    assert _decode_html("<p>전공</p>".encode("cp949"), "text/html; charset=bogus") == "<p>전공</p>"
+
+
+class StuckPool:
+    # 제출한 작업이 끝나지 않는 풀(멈춘 trafilatura 워커)
+    def __init__(self):
+        self.futures = []
+        self.shut = False
+        self._processes = {1: self}
+        self.terminated = False
+
+    def submit(self, fn, *args):
+        fut = Future()
+        fut.set_running_or_notify_cancel()  # 이미 실행 중 → cancel()이 먹지 않는다
+        self.futures.append(fut)
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut = True
+
+    def terminate(self):
+        self.terminated = True
+
+
+def test_repeated_timeouts_recycle_the_pool(monkeypatch):
+    pools = []
+
+    @engine.singleton
+    def fake_pool():
+        pools.append(StuckPool())
+        return pools[-1]
+
+    monkeypatch.setattr(engine, "extract_pool", fake_pool)
+    monkeypatch.setattr(engine, "EXTRACT_CPU_TIMEOUT_S", 0.01)
+    monkeypatch.setitem(engine._extract_timeouts, "count", 0)
+
+    assert engine._run_trafilatura("<html/>") == ""
+    assert len(pools) == 1 and not pools[0].shut
+    assert engine._run_trafilatura("<html/>") == ""
+    assert pools[0].shut and pools[0].terminated
+    engine._run_trafilatura("<html/>")
+    assert len(pools) == 2  # 다음 호출은 새 풀에서
+
+
+def test_recycling_an_already_replaced_pool_does_not_build_a_new_one(monkeypatch):
+    built = []
+
+    @engine.singleton
+    def fake_pool():
+        built.append(StuckPool())
+        return built[-1]
+
+    monkeypatch.setattr(engine, "extract_pool", fake_pool)
+    old = fake_pool()
+    fake_pool.clear()  # 다른 스레드가 이미 갈아엎은 상황
+    engine._recycle_extract_pool(old)
+    assert len(built) == 1 and fake_pool.peek() is None
+    assert old.shut and old.terminated
+
+    current = fake_pool()
+    engine._recycle_extract_pool(old)  # 예전 풀을 다시 정리해도 현재 풀은 그대로
+    assert fake_pool.peek() is current and not current.shut
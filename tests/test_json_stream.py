@@ -0,0 +1,31 @@
+from engine import JsonItemStream
+
+
+def feed_all(parser, text, step):
+    items = []
+    for i in range(0, len(text), step):
+        items.extend(parser.feed(text[i : i + step]))
+    return items
+
+
+def test_items_come_out_as_they_close_regardless_of_chunking():
+    text = 'preamble {"digests": [{"t": "a}{[\\"", "n": [1, {"x": 2}]}, {"t": "b"}], "overall": {"digests": [{"t": "no"}]}}'
+    for step in (1, 3, 17, len(text)):
+        parser = JsonItemStream("digests")
+        assert feed_all(parser, text, step) == [{"t": 'a}{["', "n": [1, {"x": 2}]}, {"t": "b"}]
+        assert parser.document["overall"] == {"digests": [{"t": "no"}]}
+        assert parser.emitted == [0, 1]
+
+
+def test_broken_item_is_skipped_but_keeps_its_position():
+    parser = JsonItemStream("digests")
+    items = feed_all(parser, '{"digests": [{"t": "a"}, {"t": "b",}, {"t": "c"}]}', 5)
+    assert items == [{"t": "a"}, {"t": "c"}]
+    assert parser.emitted == [0, 2]
+    assert parser.document is None
+
+
+def test_other_arrays_are_ignored():
+    parser = JsonItemStream("digests")
+    assert feed_all(parser, '{"other": [{"t": 1}], "digests": []}', 4) == []
+    assert parser.document == {"other": [{"t": 1}], "digests": []}
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from engine import LLMCache
+
+
+def test_key_is_stable_across_dict_order():
+    a = LLMCache.key("m", "sys", 0.4, {"a": 1, "b": [1, 2]})
+    b = LLMCache.key("m", "sys", 0.4, {"b": [1, 2], "a": 1})
+    assert a == b
+    assert a != LLMCache.key("m", "sys", 0.5, {"a": 1, "b": [1, 2]})
+
+
+def test_ttl_expiry():
+    cache = LLMCache(ttl_s=0.05)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.08)
+    assert cache.get("k") is None
+
+
+def test_lru_evicts_by_bytes():
+    cache = LLMCache(max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")  # a를 최근으로
+    cache.put("c", "12345")
+    assert cache.get("a") == "12345"
+    assert cache.get("b") is None
+    assert cache.get("c") == "12345"
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    cache = LLMCache()
+    calls = []
+    gate = threading.Event()
+
+    def compute() -> str:
+        calls.append(1)
+        gate.wait(1)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["done"] * 5
+    assert len(calls) == 1
+
+
+def test_invalid_or_empty_results_are_not_cached():
+    cache = LLMCache()
+    replies = iter(["죄송하지만 도와드릴 수 없습니다.", '{"ok": 1}'])
+    is_json = lambda text: text.startswith("{")  # noqa: E731
+    assert cache.get_or_compute("k", lambda: next(replies), is_json) == "죄송하지만 도와드릴 수 없습니다."
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: next(replies), is_json) == '{"ok": 1}'
+    assert cache.get("k") == '{"ok": 1}'
+
+    cache.get_or_compute("empty", lambda: "")
+    assert cache.get("empty") is None
+
+
+def test_errors_propagate_and_are_not_cached():
+    cache = LLMCache()
+
+    def boom() -> str:
+        raise RuntimeError("upstream")
+
+    try:
+        cache.get_or_compute("k", boom)
+    except RuntimeError:
+        pass
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
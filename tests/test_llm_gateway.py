@@ -0,0 +1,41 @@
+import sys
+
+import pytest
+
+import engine
+from engine import LLMGateway, _parse_reset, _RateBucket
+
+
+def test_parse_reset_units():
+    assert _parse_reset("20ms") == pytest.approx(0.02)
+    assert _parse_reset("6m0s") == pytest.approx(360.0)
+    assert _parse_reset("1h2m3.5s") == pytest.approx(3723.5)
+    assert _parse_reset(None) is None
+
+
+def test_slot_wait_times_out(monkeypatch):
+    monkeypatch.setattr(engine, "LLM_SLOT_TIMEOUT_S", 0.05)
+    gw = LLMGateway(max_concurrency=1)
+    gw._clients["k"] = object()
+    gw._buckets["k"] = _RateBucket()
+    gw._slots.acquire()  # 멈춘 호출이 슬롯을 잡고 있는 상황
+    with pytest.raises(TimeoutError):
+        gw.chat("k", model="m", messages=[])
+
+
+def test_rate_bucket_refills_after_reset():
+    b = _RateBucket()
+    b.limit_requests, b.remaining_requests, b.reset_requests_at = 10, 0, 5.0
+    b.refill(4.0)
+    assert b.remaining_requests == 0
+    b.refill(5.0)
+    assert b.remaining_requests == 10
+
+
+def test_broken_openai_import_disables_llm(monkeypatch):
+    monkeypatch.setattr(engine, "OPENAI_AVAILABLE", True)
+    monkeypatch.setitem(sys.modules, "openai", None)  # import openai → ImportError
+    assert engine.llm_enabled("sk-x")
+    with pytest.raises(RuntimeError):
+        LLMGateway().client("sk-x")
+    assert not engine.llm_enabled("sk-x")
@@ -0,0 +1,39 @@
+from engine import count_tokens, pack_context, split_sentences, truncate_tokens
+
+
+def test_short_text_is_returned_unchanged():
+    assert pack_context("짧은 본문입니다.", "UX", 100) == "짧은 본문입니다."
+
+
+def test_relevant_sentence_is_kept_and_gaps_are_marked():
+    filler = " ".join(f"관련 없는 문장 {i} 입니다. " for i in range(40))
+    text = f"{filler} UX 리서치 인턴 모집 공고입니다. {filler}"
+    out = pack_context(text, "UX 리서치 인턴", 40)
+    assert "UX 리서치 인턴 모집 공고입니다." in out
+    assert count_tokens(out) <= 60
+    assert "…" in out
+
+
+def test_dropped_lead_is_marked():
+    text = "관련 없는 머리말 문장이 아주 길게 이어집니다 " * 5 + ". 데이터 분석 직무 설명. " + "다른 내용. " * 30
+    out = pack_context(text, "데이터 분석", 12)
+    assert out.startswith("…")
+    assert "데이터 분석" in out
+
+
+def test_unpunctuated_block_falls_back_to_truncated_prefix():
+    text = "구두점없이이어지는추출본문" * 200
+    out = pack_context(text, "본문", 50)
+    assert out
+    assert count_tokens(out) <= 55
+
+
+def test_truncate_tokens_respects_budget():
+    text = "토큰 예산 안에서 자르기 " * 50
+    assert count_tokens(truncate_tokens(text, 20)) <= 20
+    assert truncate_tokens(text, 0) == ""
+    assert truncate_tokens("짧다", 50) == "짧다"
+
+
+def test_split_sentences():
+    assert split_sentences("첫 문장. 둘째 문장!\n셋째") == ["첫 문장.", "둘째 문장!", "셋째"]
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import engine
+from engine import fuse_rrf
+
+
+def _frame(links, cat):
+    return pd.DataFrame(
+        [{"Select": False, "Title": l, "Snippet": "", "Link": l, "Published": "", "Type": cat} for l in links]
+    )
+
+
+def test_rrf_merges_duplicates_and_ranks_by_summed_score():
+    out = fuse_rrf({"news": _frame(["a", "b", "c"], "news"), "blog": _frame(["b/", "d"], "blog")})
+    # 같은 링크(끝 슬래시 무시)는 한 행으로, 표시 값은 가장 높은 순위의 것
+    assert list(out["Link"]) == ["b/", "a", "d", "c"]
+    assert out.loc[0, "Type"] == "blog,news"
+
+
+def test_rrf_ignores_empty_inputs():
+    assert fuse_rrf({"news": pd.DataFrame(), "blog": None}).empty
+
+
+def test_all_pages_yields_progressively_and_reports_category_errors(monkeypatch):
+    def pages(query, cid, secret, category, total, sort):
+        if category == "blog":
+            raise RuntimeError("429")
+        yield _frame([f"{category}-1", f"{category}-2"], category)
+        yield _frame([f"{category}-3"], category)
+
+    monkeypatch.setattr(engine, "naver_search_pages", pages)
+    updates = list(engine.naver_search_all_pages("q", "id", "secret", display=10))
+    assert len(updates) == 5  # 페이지 4개 + 최종
+    assert len(updates[0][0]) in (1, 2)  # 첫 페이지만으로도 표가 나온다
+    final, errors = updates[-1]
+    assert sorted(final["Link"]) == ["news-1", "news-2", "news-3", "webkr-1", "webkr-2", "webkr-3"]
+    assert list(errors) == ["blog"]
+    assert len(engine.naver_search_all("q", "id", "secret", display=3)) == 3
+
+
+def test_search_all_raises_only_when_every_category_fails(monkeypatch):
+    def pages(*args):
+        raise RuntimeError("down")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(engine, "naver_search_pages", pages)
+    with pytest.raises(RuntimeError):
+        engine.naver_search_all("q", "id", "secret")
@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import engine
+from engine import MemoryCacheBackend, SQLiteCacheBackend, decode_value, encode_value
+
+
+def test_json_and_tuple_round_trip():
+    value = ({"a": [1, "두"]}, [], "x", None)
+    assert decode_value(encode_value(value)) == value
+    assert decode_value(encode_value({"n": 1.5})) == {"n": 1.5}
+
+
+def test_dataframe_round_trip_keeps_index_and_dtypes():
+    df = pd.DataFrame({"A": [1.0, 2.5], "B": ["x", "y"]}, index=pd.Index(["2024-01-01", "2024-01-08"], name="period"))
+    df.columns.name = "keyword"
+    frame, meta = decode_value(encode_value((df, {"unit": "week"})))
+    pd.testing.assert_frame_equal(frame, df.rename_axis(columns=None))
+    assert meta == {"unit": "week"}
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_backends_expire_and_overwrite(kind, tmp_path):
+    backend = MemoryCacheBackend() if kind == "memory" else SQLiteCacheBackend(str(tmp_path / "shared.sqlite"))
+    backend.set("k", b"v1", 60)
+    backend.set("k", b"v2", 60)
+    assert backend.get("k") == b"v2"
+    backend.set("old", b"x", -1)
+    assert backend.get("old") is None
+    assert backend.get("missing") is None
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_bytes=4)
+    backend.set("a", b"aa", 60)
+    backend.set("b", b"bb", 60)
+    backend.get("a")
+    backend.set("c", b"cc", 60)
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (b"aa", None, b"cc")
+
+
+class LockedBackend:
+    # 다른 프로세스가 쓰기 락을 오래 잡은 SQLite 캐시
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def set(self, key, value, ttl_s):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_cache_errors_do_not_fail_the_call(monkeypatch):
+    monkeypatch.setattr(engine, "cache_backend", LockedBackend)
+    calls = []
+    gate = threading.Event()
+
+    @engine.ttl_cache(60)
+    def lookup(q):
+        calls.append(q)
+        gate.wait(2)
+        return {"q": q}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lookup("x"))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == [{"q": "x"}] * 3
+    assert calls == ["x"]  # 캐시가 고장 나도 동시 호출은 한 번만 계산(single-flight)
@@ -0,0 +1,110 @@
+import pytest
+
+import engine
+from engine import _balanced_candidates, json_schema, missing_fields, try_parse_json
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def test_try_parse_json_strips_prose_and_fences():
+    assert try_parse_json('결과입니다:\n```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+    assert try_parse_json('[1, 2]') is None
+    assert try_parse_json("") is None
+    assert try_parse_json("no json here") is None
+
+
+def test_try_parse_json_closes_a_truncated_response():
+    assert try_parse_json('{"a": "x", "b": ["y", "z') == {"a": "x", "b": ["y", "z"]}
+    assert try_parse_json('{"a": 1, "b": {"c": 2, "d": tru') == {"a": 1, "b": {"c": 2}}
+    assert try_parse_json('{"a": [1, 2,], }') == {"a": [1, 2]}
+
+
+def test_balanced_candidates_respects_strings():
+    assert next(_balanced_candidates('{"a": "}{"} trailing')) == '{"a": "}{"}'
+    candidates = list(_balanced_candidates('{"a": 1, "b": [2, 3'))
+    assert candidates[0] == '{"a": 1, "b": [2, 3]}'
+    assert '{"a": 1, "b": [2]}' in candidates
+    assert '{"a": 1}' in candidates
+
+
+def test_missing_fields_checks_presence_and_container_type():
+    schema = {"s": "string", "xs": ["string"], "o": {"k": "string"}, "n": 1}
+    assert missing_fields({"s": "", "xs": [], "o": {}, "n": 0}, schema) == []
+    assert missing_fields({"s": None, "xs": "a", "o": [], "extra": 1}, schema) == ["s", "xs", "o", "n"]
+
+
+def test_json_schema_is_strict():
+    out = json_schema({"p": "High|Low", "n": 1, "f": 0.5, "b": True, "xs": [{"k": "string"}], "e": []})
+    assert out["required"] == ["p", "n", "f", "b", "xs", "e"]
+    assert out["additionalProperties"] is False
+    props = out["properties"]
+    assert props["p"] == {"type": "string", "enum": ["High", "Low"]}
+    assert (props["n"], props["f"], props["b"]) == ({"type": "integer"}, {"type": "number"}, {"type": "boolean"})
+    assert props["xs"]["items"]["additionalProperties"] is False
+    assert props["e"] == {"type": "array", "items": {"type": "string"}}
+
+
+@pytest.fixture
+def rejections(monkeypatch):
+    monkeypatch.setattr(engine, "_rejected_formats", {})
+    monkeypatch.setattr(engine, "LLM_RESPONSE_FORMAT", "json_schema")
+    return engine._rejected_formats
+
+
+def kinds(model, schema):
+    return [(f or {}).get("type") for f in engine._response_formats(model, schema)]
+
+
+def test_schema_specific_rejection_only_skips_that_schema(rejections):
+    calls = []
+
+    def call(fmt):
+        calls.append(fmt.get("response_format", {}).get("type"))
+        if calls[-1] == "json_schema":
+            raise BadRequest("Invalid schema for response_format 'output': bad enum")
+        return "ok"
+
+    assert engine._with_response_format("m", {"a": "string"}, call) == "ok"
+    assert calls == ["json_schema", "json_object"]
+    assert kinds("m", {"a": "string"}) == ["json_object", None]
+    assert kinds("m", {"b": "string"}) == ["json_schema", "json_object", None]
+
+
+def test_unsupported_format_is_skipped_for_the_model_until_it_expires(rejections, monkeypatch):
+    def call(fmt):
+        if fmt.get("response_format", {}).get("type") == "json_schema":
+            raise BadRequest("'response_format' of type 'json_schema' is not supported with this model.")
+        return "ok"
+
+    engine._with_response_format("m", {"a": "string"}, call)
+    assert kinds("m", {"b": "string"}) == ["json_object", None]
+    assert kinds("other", {"b": "string"}) == ["json_schema", "json_object", None]
+    monkeypatch.setattr(engine.time, "time", lambda: 1e12)
+    assert kinds("m", {"b": "string"}) == ["json_schema", "json_object", None]
+    assert rejections == {}
+
+
+def test_other_errors_are_not_remembered(rejections):
+    def call(fmt):
+        raise BadRequest("max_tokens is too large")
+
+    with pytest.raises(BadRequest):
+        engine._with_response_format("m", {"a": "string"}, call)
+    assert rejections == {}
+
+
+def test_reduce_unwraps_overall_before_checking_fields(monkeypatch):
+    monkeypatch.setattr(
+        engine,
+        "llm_complete",
+        lambda *a, **k: '{"overall": {"themes": ["t"], "recommended_queries": ["q"], "what_to_do_next": ["n"]}}',
+    )
+
+    def no_repair(*a, **k):
+        raise AssertionError("감싼 응답을 빠진 필드로 보고 보정하면 안 된다")
+
+    monkeypatch.setattr(engine, "llm_repair_fields", no_repair)
+    out = engine.llm_digest_reduce([{"title": "a"}], "k", "m")
+    assert out == {"themes": ["t"], "recommended_queries": ["q"], "what_to_do_next": ["n"]}
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from engine import TrendStore, _interprocess_lock
+
+START, END = date(2024, 1, 1), date(2024, 12, 29)
+
+
+def volume(keyword, periods):
+    # 키워드별 "실제" 검색량: 결정적이고 0이 아닌 값
+    seed = sum(map(ord, keyword))
+    return np.array([10 + (seed * (i + 3)) % 37 + seed % 11 for i in range(len(periods))], dtype=float)
+
+
+def datalab_response(start, end, keywords):
+    # Datalab처럼 요청 안의 최대값을 100으로 맞춘 주간 ratio
+    periods = pd.date_range(start, end, freq="W-MON").strftime("%Y-%m-%d")
+    raw = pd.DataFrame({k: volume(k, periods) for k in keywords}, index=periods)
+    return raw * (100.0 / raw.max().max())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    calls = []
+
+    def trend_many(client_id, client_secret, start, end, time_unit, keywords, anchor=None):
+        calls.append(list(keywords))
+        if "Z" in keywords and anchor is not None:
+            raise ValueError("anchor 검색량 0")
+        return datalab_response(start, end, keywords)
+
+    monkeypatch.setattr(engine, "naver_datalab_trend_many", trend_many)
+    st = TrendStore(str(tmp_path))
+    st.calls = calls
+    return st
+
+
+def q(store, keywords, anchor=None):
+    return store.query("id", "secret", START, END, "week", keywords, anchor)
+
+
+def test_covered_query_is_served_from_disk(store):
+    first = q(store, ["A", "B"])
+    assert len(store.calls) == 1
+    again = q(store, ["B", "A"])
+    assert len(store.calls) == 1
+    pd.testing.assert_frame_equal(first[["A", "B"]], again[["A", "B"]])
+
+
+def test_new_keyword_is_stitched_onto_the_stored_scale(store):
+    q(store, ["A", "B"])
+    out = q(store, ["A", "C"])
+    assert store.calls[-1] == ["C", "A"]  # 새 키워드 + 기준 키워드만
+    periods = out.index
+    expected = volume("C", periods) / volume("A", periods)
+    np.testing.assert_allclose((out["C"] / out["A"]).to_numpy(), expected, rtol=1e-3)
+
+
+def test_slow_fetch_does_not_block_covered_views(store, monkeypatch):
+    q(store, ["A"])
+    original = engine.naver_datalab_trend_many
+    gate = threading.Event()
+
+    def slow(*args, **kwargs):
+        gate.wait(2)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "naver_datalab_trend_many", slow)
+    t = threading.Thread(target=q, args=(store, ["D"]))
+    t.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    q(store, ["A"])
+    assert time.perf_counter() - started < 0.5
+    gate.set()
+    t.join()
+
+
+def test_unscalable_anchor_falls_back_to_direct_fetch(store):
+    q(store, ["A"])
+    out = q(store, ["Z"])
+    assert not out.empty
+    assert store.calls[-1] == ["Z"]
+    assert "Z" not in store._load("week")[1]
+
+
+def test_interprocess_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "x.lock")
+    order = []
+
+    def hold():
+        with _interprocess_lock(path):
+            order.append("a-in")
+            time.sleep(0.2)
+            order.append("a-out")
+
+    t = threading.Thread(target=hold)
+    t.start()
+    time.sleep(0.05)
+    with _interprocess_lock(path):
+        order.append("b-in")
+    t.join()
+    assert order == ["a-in", "a-out", "b-in"]
+
+
+def test_anchored_chunks_share_one_scale(monkeypatch):
+    def trend(client_id, client_secret, start, end, time_unit, groups):
+        return datalab_response(start, end, [g["groupName"] for g in groups])
+
+    monkeypatch.setattr(engine, "naver_datalab_trend", trend)
+    keywords = [f"k{i}" for i in range(11)]
+    out = engine.naver_datalab_trend_many("id", "secret", "2024-01-01", "2024-06-30", "week", keywords, anchor="k0")
+    assert list(out.columns) == keywords
+    assert out.max().max() == pytest.approx(100.0)
+    truth = pd.DataFrame({k: volume(k, out.index) for k in keywords}, index=out.index)
+    np.testing.assert_allclose((out / out["k0"].to_numpy()[:, None]).to_numpy(), (truth / truth["k0"].to_numpy()[:, None]).to_numpy(), rtol=1e-3)
+
+
+def test_zero_anchor_raises(monkeypatch):
+    def trend(client_id, client_secret, start, end, time_unit, groups):
+        df = datalab_response(start, end, [g["groupName"] for g in groups])
+        df["k0"] = 0.0
+        return df
+
+    monkeypatch.setattr(engine, "naver_datalab_trend", trend)
+    with pytest.raises(ValueError):
+        engine.naver_datalab_trend_many("id", "secret", "2024-01-01", "2024-03-01", "week", [f"k{i}" for i in range(7)], "k0")
+
+
+def test_week_snapping():
+    assert engine._snap_period(date(2024, 5, 16), "week") == date(2024, 5, 13)
+    assert engine._snap_period(date(2024, 5, 16), "month") == date(2024, 5, 1)
+    assert engine._complete_until(date(2024, 5, 16), "week") == date(2024, 5, 12)